@@ -0,0 +1,162 @@
+"""
+Micro-benchmarks for the score validation engine.
+
+Each case reports the best per-op time over several repeats and is compared
+with the stored baseline in baselines.json; a case slower than the baseline
+by more than the threshold is a regression and the script exits non-zero.
+
+    cd backend && python benchmarks/bench_engine.py              # compare
+    cd backend && python benchmarks/bench_engine.py --save       # record baselines
+    cd backend && python benchmarks/bench_engine.py -k simulate  # subset
+
+Baselines are machine specific; re-record them when moving to new hardware.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+SEED = "00c0ffee12345678"
+ROOM_COUNTS = [10, 100, 1000, 10000, 100000]
+
+# No hazard so synthetic runs survive every room and the whole replay is simulated
+NO_HAZARD_PACK = server.ContentPack(hazard_curve={"base": 0, "per_depth": 0, "per_greed": 0, "cap": 0})
+
+
+def make_replay(rooms):
+    """Synthetic replay cycling through every room choice the simulator handles"""
+    choices = ["continue", "continue", "modifier_treasure", "continue", "modifier_shrine", "continue"]
+    return server.ReplayLog(
+        seed=SEED,
+        contentVersion=NO_HAZARD_PACK.version,
+        rooms=[
+            {"depth": i + 1, "type": "normal", "choice": choices[i % len(choices)]}
+            for i in range(rooms)
+        ],
+        choices=[],
+        rolls=0,
+        items=[],
+    )
+
+
+def rng_next():
+    rng = server.SeededRNG(SEED)
+    return lambda: rng.next()
+
+
+def rng_weighted_choice():
+    rng = server.SeededRNG(SEED)
+    items = [{"item": rarity, "weight": weight} for rarity, weight in server.ContentPack().rarity_weights.items()]
+    return lambda: rng.weighted_choice(items)
+
+
+def simulate_run(rooms):
+    def setup():
+        replay = make_replay(rooms)
+        return lambda: server.GameSimulator(NO_HAZARD_PACK, SEED).simulate_run(replay)
+    return setup
+
+
+def replay_digest(rooms):
+    def setup():
+        replay = make_replay(rooms)
+        return lambda: server.calculate_replay_digest(replay)
+    return setup
+
+
+def content_pack_parse():
+    # Same shape as the stored content_packs document
+    doc = json.loads(server.dump_json(server.jsonable_encoder(server.ContentPack().dict())))
+    return lambda: server.ContentPack(**doc)
+
+
+def daily_seed():
+    now = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    return lambda: server.generate_daily_seed(now)
+
+
+CASES = {
+    "rng.next": rng_next,
+    "rng.weighted_choice": rng_weighted_choice,
+    **{f"simulate_run[{rooms}]": simulate_run(rooms) for rooms in ROOM_COUNTS},
+    **{f"replay_digest[{rooms}]": replay_digest(rooms) for rooms in ROOM_COUNTS},
+    "content_pack.parse": content_pack_parse,
+    "generate_daily_seed": daily_seed,
+}
+
+
+def measure(func, repeat, min_time):
+    """Best seconds per op; the loop count is chosen so one repeat takes about min_time"""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed * 10 > min_time else 10
+    return min([elapsed] + timer.repeat(repeat=repeat - 1, number=number)) / number
+
+
+def load_baselines():
+    if BASELINES.exists():
+        return json.loads(BASELINES.read_text())
+    return {"cases": {}}
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="store results as the new baselines")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown vs baseline (0.20 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases containing this string")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+    print(f"{'case':<28} {'time/op':>12} {'baseline':>12} {'change':>8}")
+    for name, setup in CASES.items():
+        if args.pattern not in name:
+            continue
+        seconds = measure(setup(), args.repeat, args.min_time)
+        results[name] = seconds
+        baseline = baselines["cases"].get(name)
+        if baseline:
+            change = seconds / baseline - 1
+            flag = "  REGRESSION" if change > args.threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<28} {format_time(seconds):>12} {format_time(baseline):>12} {change:>+7.1%}{flag}")
+        else:
+            print(f"{name:<28} {format_time(seconds):>12} {'-':>12} {'-':>8}")
+
+    if args.save:
+        baselines["cases"].update(results)
+        baselines["machine"] = {"python": platform.python_version(), "platform": platform.platform()}
+        baselines["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"saved {len(results)} baselines to {BASELINES.name}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Import-time budget for server.py.
+
+Imports the server in fresh interpreters with -X importtime, reports the
+median cumulative import time and the slowest direct imports, and fails if
+the median is over budget or a deferred module got imported eagerly.
+
+    cd backend && python benchmarks/bench_import.py
+    cd backend && python benchmarks/bench_import.py --budget-ms 400 --runs 9
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Optional modules only some deployments need; they must stay out of the import path
+DEFERRED = ["sqlite3", "concurrent.futures.process"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_once():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    children = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, total_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        modules[name] = (self_us, total_us)
+        # Children are listed before their parent; keep the ones under server
+        if indent == 3:
+            children.append((total_us, name))
+        elif indent == 1:
+            if name == "server":
+                return modules, children
+            children = []
+    raise SystemExit(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="fail when the median import is slower (machine specific)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_once() for _ in range(args.runs)]
+    totals = [modules["server"][1] / 1000 for modules, _ in runs]
+    median = statistics.median(totals)
+    modules, direct = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    print(f"import server: median {median:.0f} ms over {args.runs} runs (min {min(totals):.0f}, max {max(totals):.0f})")
+    print(f"server.py module body: {modules['server'][0] / 1000:.0f} ms")
+    print(f"\nslowest direct imports:")
+    for total_us, name in sorted(direct, reverse=True)[:args.top]:
+        print(f"  {name:<32} {total_us / 1000:>8.1f} ms")
+
+    failures = []
+    eager = [name for name in DEFERRED if name in modules]
+    if eager:
+        failures.append(f"deferred modules imported eagerly: {', '.join(eager)}")
+    if median > args.budget_ms:
+        failures.append(f"median {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Pre-fork worker memory and startup check.
+
+Starts the server once as a single standalone process and once with WORKERS
+pre-forked workers, then reports per-worker fork-to-ready time and memory
+(RSS, Pss, shared, private) right after startup and again after a burst of
+requests. Fails if a worker doesn't become ready in time, or if workers keep
+too little of their memory shared with the master.
+
+    cd backend && python benchmarks/bench_prefork.py
+    cd backend && python benchmarks/bench_prefork.py --workers 8 --requests 5000
+    cd backend && STORAGE_BACKEND=mongo python benchmarks/bench_prefork.py
+
+Defaults to a throwaway SQLite database; set STORAGE_BACKEND to use another.
+Memory figures come from /proc/<pid>/smaps_rollup, so this needs Linux.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import process_memory  # noqa: E402
+
+# Importing server configures root logging; keep per-request client logs out of the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+BACKEND = Path(__file__).resolve().parent.parent
+MIB = 1024 * 1024
+PATHS = ["/api/content", "/api/leaderboard", "/api/leaderboard?daily=true", "/api/daily"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(workers, port, log_path, env):
+    env = dict(env, WORKERS=str(workers), HOST="127.0.0.1", PORT=str(port))
+    log = open(log_path, "w")
+    return subprocess.Popen([sys.executable, "server.py"], cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def ready_events(log_path):
+    events = []
+    for line in Path(log_path).read_text().splitlines():
+        if line.startswith("{"):
+            entry = json.loads(line)
+            if entry.get("event") == "worker_ready":
+                events.append(entry)
+    return events
+
+
+def children(pid):
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    return [int(child) for child in path.read_text().split()] if path.exists() else []
+
+
+def wait_for(condition, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server exited with status {process.returncode}")
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def is_ready(base_url):
+    try:
+        return httpx.get(f"{base_url}/api/ready", timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+def load(base_url, requests):
+    # A new connection per request so the kernel spreads them across workers
+    with httpx.Client(base_url=base_url, timeout=10, headers={"Connection": "close"}) as http:
+        for i in range(requests):
+            http.get(PATHS[i % len(PATHS)])
+
+
+def print_memory(label, rows):
+    print(f"\n{label}")
+    print(f"  {'pid':>7} {'ready ms':>9} {'rss MiB':>8} {'pss MiB':>8} {'shared MiB':>11} {'private MiB':>12}")
+    for pid, ready_ms, memory in rows:
+        ready = f"{ready_ms:.0f}" if ready_ms is not None else "-"
+        print(
+            f"  {pid:>7} {ready:>9} {memory['resident_memory_bytes'] / MIB:>8.1f} "
+            f"{memory['proportional_memory_bytes'] / MIB:>8.1f} {memory['shared_memory_bytes'] / MIB:>11.1f} "
+            f"{memory['private_memory_bytes'] / MIB:>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000, help="requests sent before the second measurement")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for readiness")
+    parser.add_argument("--max-ready-ms", type=float, default=2000.0, help="slowest allowed fork-to-ready time")
+    parser.add_argument(
+        "--max-private-ratio", type=float, default=0.6,
+        help="highest allowed mean worker private memory after load, relative to a standalone server's RSS"
+    )
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        raise SystemExit("needs /proc/<pid>/smaps_rollup (Linux)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LOG_LEVEL="INFO")
+        env.setdefault("STORAGE_BACKEND", "sqlite")
+        env.setdefault("SQLITE_PATH", str(Path(tmp) / "bench.db"))
+        env.setdefault("RATE_LIMIT_PATH", str(Path(tmp) / "ratelimit"))
+
+        # Standalone server: what every worker costs without fork sharing
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        started = time.monotonic()
+        standalone = start(1, port, Path(tmp) / "standalone.log", env)
+        try:
+            if not wait_for(lambda: is_ready(base_url), standalone, args.timeout):
+                raise SystemExit("standalone server did not become ready")
+            start_ms = (time.monotonic() - started) * 1000
+            load(base_url, args.requests)
+            baseline = process_memory(standalone.pid)
+        finally:
+            stop(standalone)
+        print_memory(f"standalone server (process start to ready {start_ms:.0f} ms, after {args.requests} requests)", [(standalone.pid, None, baseline)])
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        log_path = Path(tmp) / "prefork.log"
+        master = start(args.workers, port, log_path, env)
+        failures = []
+        try:
+            if not wait_for(lambda: len(ready_events(log_path)) >= args.workers, master, args.timeout):
+                raise SystemExit(f"only {len(ready_events(log_path))} of {args.workers} workers became ready")
+            ready_ms = {int(event["message"].split()[1]): event["fork_to_ready_ms"] for event in ready_events(log_path)}
+            pids = children(master.pid)
+            print_memory("master", [(master.pid, None, process_memory(master.pid))])
+            print_memory("workers after startup", [(pid, ready_ms.get(pid), process_memory(pid)) for pid in pids])
+            load(base_url, args.requests * args.workers)
+            after = [(pid, ready_ms.get(pid), process_memory(pid)) for pid in pids]
+            print_memory(f"workers after {args.requests * args.workers} requests", after)
+        finally:
+            stop(master)
+
+    slowest = max(ready_ms.values())
+    private = statistics.mean(memory["private_memory_bytes"] for _, _, memory in after)
+    ratio = private / baseline["resident_memory_bytes"]
+    print(f"\nfork to ready: median {statistics.median(ready_ms.values()):.0f} ms, slowest {slowest:.0f} ms")
+    print(f"mean worker private memory: {private / MIB:.1f} MiB = {ratio:.0%} of a standalone server's RSS")
+
+    if slowest > args.max_ready_ms:
+        failures.append(f"slowest worker took {slowest:.0f} ms to become ready (limit {args.max_ready_ms:.0f} ms)")
+    if ratio > args.max_private_ratio:
+        failures.append(f"workers keep {ratio:.0%} of a standalone RSS private (limit {args.max_private_ratio:.0%})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
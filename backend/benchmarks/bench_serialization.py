@@ -0,0 +1,91 @@
+"""
+Serialization benchmark for hot endpoints.
+
+Compares the previous pydantic + jsonable_encoder + json.dumps path with the
+direct dump_json path for a leaderboard page and the /api/content body.
+
+    cd backend && python benchmarks/bench_serialization.py
+"""
+
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_rows(count):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "username": f"Wanderer{i:04d}",
+            "score": 100000 - i * 37,
+            "depth": 10 + i % 20,
+            "artifacts": [f"{i:016x}"] * (i % 5),
+            "day": None,
+            "created_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_leaderboard(rows, total):
+    entries = [
+        server.LeaderboardEntry(
+            username=row.get("username", "Anonymous"),
+            score=row["score"],
+            depth=row["depth"],
+            artifacts=len(row["artifacts"]),
+            day=row.get("day"),
+            created_at=row["created_at"],
+        )
+        for row in rows
+    ]
+    response = server.LeaderboardResponse(rows=entries, total=total)
+    # FastAPI re-validates against response_model before encoding
+    validated = server.LeaderboardResponse.model_validate(response)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_leaderboard(rows, total):
+    return server.json_response({"rows": [server.format_leaderboard_row(row) for row in rows], "total": total}).body
+
+
+def legacy_content(pack):
+    return json.dumps(jsonable_encoder(pack.dict()), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def bench(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<32} {seconds * 1e6:>10.1f} us/op")
+    return seconds
+
+
+def main():
+    print(f"encoder: {'orjson' if server.orjson else 'json'}")
+    rows = make_rows(50)
+    assert json.loads(legacy_leaderboard(rows, 1234)) == json.loads(fast_leaderboard(rows, 1234))
+
+    pack = server.ContentPack()
+    server.cache_content_pack(pack)
+    assert json.loads(legacy_content(pack)) == json.loads(server.content_cache["body"])
+
+    legacy = bench("leaderboard page (legacy)", lambda: legacy_leaderboard(rows, 1234), 2000)
+    fast = bench("leaderboard page (fast)", lambda: fast_leaderboard(rows, 1234), 2000)
+    print(f"{'speedup':<32} {legacy / fast:>10.1f}x")
+
+    legacy = bench("content pack (legacy)", lambda: legacy_content(pack), 500)
+    fast = bench("content pack (cached body)", lambda: server.content_cache["body"], 500)
+    rebuild = bench("content pack (cache rebuild)", lambda: server.cache_content_pack(pack), 500)
+    print(f"{'speedup (cached)':<32} {legacy / fast:>10.1f}x")
+    print(f"{'speedup (rebuild)':<32} {legacy / rebuild:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Storage backend benchmark.
+
+Runs the same workload against each Storage implementation: batched score
+inserts, digest claims and duplicate checks, item mints, rank (count_above),
+top and deep pages, and active pack reads.
+
+    cd backend && python benchmarks/bench_storage.py                  # memory, sqlite
+    cd backend && python benchmarks/bench_storage.py --mongo          # plus MONGO_URL, scratch DB
+    cd backend && python benchmarks/bench_storage.py --rows 100000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+def make_scores(count):
+    now = datetime.now(timezone.utc)
+    day = now.strftime("%Y-%m-%d")
+    return [
+        server.Score(
+            username=f"bench{i % 5000:04d}",
+            seed=f"{random.getrandbits(63):016x}",
+            version="1.0.2",
+            daily=i % 4 == 0,
+            day=day if i % 4 == 0 else None,
+            score=random.randint(0, 200000),
+            depth=random.randint(1, 60),
+            duration_s=0,
+            artifacts=[f"{random.getrandbits(63):016x}" for _ in range(i % 4)],
+            replay_digest=uuid.uuid4().hex,
+            created_at=now,
+        ).dict()
+        for i in range(count)
+    ]
+
+
+async def timed(name, count, func):
+    started = time.perf_counter()
+    for i in range(count):
+        await func(i)
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<24} {count / elapsed:>10.0f} ops/s {elapsed / count * 1e6:>10.1f} us/op")
+
+
+async def bench(storage, rows, batch_size):
+    print(f"\n{storage.name}")
+    await storage.connect()
+    scores = make_scores(rows)
+    batches = [scores[i:i + batch_size] for i in range(0, len(scores), batch_size)]
+
+    started = time.perf_counter()
+    for batch in batches:
+        await storage.insert_scores(batch)
+    elapsed = time.perf_counter() - started
+    print(f"  {'insert_scores':<24} {rows / elapsed:>10.0f} rows/s (batches of {batch_size})")
+
+    digests = [uuid.uuid4().hex for _ in range(2000)]
+    await timed("claim_digest", len(digests), lambda i: storage.claim_digest(digests[i]))
+    await timed("has_digest", len(digests), lambda i: storage.has_digest(digests[i]))
+    items = [{"hash": f"{random.getrandbits(63):016x}", "name": "1/1 Artifact", "rarity": "1/1"} for _ in range(2000)]
+    await timed("mint_items", len(items) // 10, lambda i: storage.mint_items(items[i * 10:(i + 1) * 10]))
+    await timed("item_exists", len(items), lambda i: storage.item_exists(items[i]["hash"]))
+    await timed("count_board", 200, lambda i: storage.count_board(False))
+    await timed("count_above", 1000, lambda i: storage.count_above(False, None, random.randint(0, 200000)))
+    await timed("page(top 50)", 1000, lambda i: storage.page(False, None, 0, 50))
+    await timed("page(deep 50)", 200, lambda i: storage.page(False, None, rows // 2, 50))
+    await storage.set_active_pack(server.ContentPack().dict())
+    await timed("get_active_pack", 1000, lambda i: storage.get_active_pack())
+    await storage.close()
+
+
+async def main(args):
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [server.MemoryStorage(), server.SqliteStorage(str(Path(tmp) / "bench.db"))]
+        if args.mongo:
+            database = server.client[f"bench_{uuid.uuid4().hex[:8]}"]
+            server.db = database
+            backends.append(server.MongoStorage(database))
+        try:
+            for storage in backends:
+                if storage.name == "mongo":
+                    await server.ensure_indexes()
+                await bench(storage, args.rows, args.batch_size)
+        finally:
+            if args.mongo:
+                await server.client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=server.SCORE_BATCH_SIZE)
+    parser.add_argument("--mongo", action="store_true", help="also benchmark MongoDB at MONGO_URL")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
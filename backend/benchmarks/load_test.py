@@ -0,0 +1,201 @@
+"""
+Async load generator for the API.
+
+Drives the FastAPI app in-process (default) or a running server over HTTP
+with a weighted mix of content fetches, leaderboard reads and valid
+simulated submissions, then reports throughput and p50/p95/p99 per endpoint.
+
+    cd backend && python benchmarks/load_test.py --store mongomock --concurrency 32 --duration 10
+    cd backend && python benchmarks/load_test.py --ramp 1,2,4,8,16,32,64,128
+    cd backend && python benchmarks/load_test.py --url http://localhost:8001 --concurrency 16
+
+In-process runs use the configured storage like the server: MongoDB via
+MONGO_URL/DB_NAME (point DB_NAME at a scratch database), STORAGE_BACKEND=memory
+or STORAGE_BACKEND=sqlite, or --store mongomock for an in-memory Mongo stand-in
+(requires the mongomock-motor package). The per-IP submit rate limit is
+disabled in-process; against a live server expect 429s on submissions.
+
+--ramp steps concurrency through the given levels and stops at saturation:
+when throughput grows by less than --saturation over the previous step, or
+the error rate passes 1%.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+DEFAULT_MIX = "content=20,daily=5,leaderboard=35,leaderboard_daily=15,around=10,stats=5,submit=10"
+
+
+def parse_mix(value):
+    mix = {}
+    for pair in value.split(","):
+        name, weight = pair.split("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+class Workload:
+    """Builds requests; submissions are replays simulated against the live content pack"""
+
+    def __init__(self, pack, max_rooms):
+        self.pack = pack
+        self.max_rooms = max_rooms
+        self.scores = [0]
+
+    def submission(self):
+        seed = f"{random.getrandbits(63):016x}"
+        rooms = [
+            {"depth": depth, "type": "normal", "choice": "continue"}
+            for depth in range(1, random.randint(3, self.max_rooms) + 1)
+        ]
+        replay = server.ReplayLog(seed=seed, contentVersion=self.pack.version, rooms=rooms, choices=[], rolls=0, items=[])
+        result = server.GameSimulator(self.pack, seed).simulate_run(replay)
+        self.scores.append(result["score"])
+        return {
+            "username": f"load{random.randint(0, 9999):04d}",
+            "seed": seed,
+            "version": self.pack.version,
+            "daily": random.random() < 0.3,
+            "replayLog": replay.dict(),
+            "items": [item.dict() for item in result["items"]],
+        }
+
+
+ENDPOINTS = {
+    "content": lambda w: ("GET", "/api/content", {}),
+    "daily": lambda w: ("GET", "/api/daily", {}),
+    "leaderboard": lambda w: ("GET", "/api/leaderboard", {"params": {"limit": 50, "offset": random.choice([0, 0, 0, 50, 100])}}),
+    "leaderboard_daily": lambda w: ("GET", "/api/leaderboard", {"params": {"daily": "true", "limit": 50}}),
+    "around": lambda w: ("GET", "/api/leaderboard/around", {"params": {"score": random.choice(w.scores)}}),
+    "stats": lambda w: ("GET", "/api/stats", {}),
+    "submit": lambda w: ("POST", "/api/score/submit", {"json": w.submission()}),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_step(http, workload, mix, concurrency, duration, honor_retry_after):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights)[0]
+            method, path, kwargs = ENDPOINTS[name](workload)
+            started = time.perf_counter()
+            retry_after = 0.0
+            try:
+                response = await http.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+                if response.status_code in (429, 503) and honor_retry_after:
+                    retry_after = float(response.headers.get("Retry-After", 0))
+            except httpx.HTTPError:
+                failed = True
+            latencies[name].append(time.perf_counter() - started)
+            if failed:
+                errors[name] += 1
+            # Back off like a real client; in-process responses can also complete
+            # without suspending, so always let other workers run
+            await asyncio.sleep(min(retry_after, max(0.0, deadline - time.perf_counter())))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(concurrency, latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    total_errors = sum(errors.values())
+    print(f"\nconcurrency {concurrency}: {total} requests in {elapsed:.1f}s = {total / elapsed:.0f} req/s, {total_errors} errors")
+    print(f"{'endpoint':<20} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        print(
+            f"{name:<20} {len(values):>7} {len(values) / elapsed:>8.1f} "
+            f"{percentile(values, 0.50) * 1e3:>8.2f} {percentile(values, 0.95) * 1e3:>8.2f} "
+            f"{percentile(values, 0.99) * 1e3:>8.2f} {errors[name]:>7}"
+        )
+    return total / elapsed, total_errors / max(total, 1)
+
+
+async def drive(args, http):
+    response = await http.get("/api/content")
+    response.raise_for_status()
+    workload = Workload(server.ContentPack(**response.json()), args.max_rooms)
+    mix = parse_mix(args.mix)
+    if not args.url and server.storage.name != "mongo":
+        # Leaderboard windows are Mongo-only
+        mix.pop("around", None)
+
+    levels = [int(level) for level in args.ramp.split(",")] if args.ramp else [args.concurrency]
+    previous = 0.0
+    for concurrency in levels:
+        throughput, error_rate = report(concurrency, *await run_step(http, workload, mix, concurrency, args.duration, not args.ignore_retry_after))
+        if error_rate > 0.01:
+            print(f"\nsaturated at concurrency {concurrency}: error rate {error_rate:.1%}")
+            break
+        if previous and throughput < previous * (1 + args.saturation):
+            print(f"\nsaturated at concurrency {concurrency}: {throughput:.0f} req/s vs {previous:.0f} req/s")
+            break
+        previous = throughput
+
+
+async def main(args):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as http:
+            await drive(args, http)
+        return
+
+    if args.store == "mongomock":
+        try:
+            import mongomock_motor
+        except ImportError:
+            raise SystemExit("--store mongomock needs the mongomock-motor package")
+        server.client = mongomock_motor.AsyncMongoMockClient()
+        server.db = server.read_db = server.client[os.environ.get("DB_NAME", "exit_or_die")]
+        server.storage = server.GuardedStorage(server.MongoStorage(server.db), server.storage_breaker)
+    server.limiter.enabled = False
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as http:
+            await drive(args, http)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server; default drives the app in-process")
+    parser.add_argument("--store", choices=["default", "mongomock"], default="default", help="database for in-process runs")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per step")
+    parser.add_argument("--ramp", help="comma separated concurrency levels")
+    parser.add_argument("--saturation", type=float, default=0.05, help="minimum throughput gain per ramp step")
+    parser.add_argument("--ignore-retry-after", action="store_true", help="retry shed requests immediately")
+    parser.add_argument("--max-rooms", type=int, default=60, help="longest synthetic replay")
+    parser.add_argument("--seed", type=int, help="seed the request mix for repeatable runs")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    asyncio.run(main(args))
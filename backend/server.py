@@ -1,37 +1,508 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, ExecutionTimeout
 import os
+import gc
+import signal
+import socket
 import logging
+import logging.handlers
+import queue
+import fcntl
+import mmap
+import struct
+import tempfile
 import hashlib
 import hmac
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Sequence, Union
 import uuid
 from datetime import datetime, timezone, timedelta
 import json
 import math
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import time
+import bisect
+import heapq
+import gzip
+import asyncio
+import zlib
+import sys
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from pymongo import monitoring
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'exit_or_die')]
-
 # Environment variables
 ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY', 'admin-secret-key')
 DAILY_SECRET = os.environ.get('DAILY_SECRET', 'daily-seed-secret')
 CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'https://*.itch.io,https://*.vercel.app,http://localhost:3000').split(',')
+TOP_BOARD_SIZE = int(os.environ.get('TOP_BOARD_SIZE', '200'))
+TOP_BOARD_TTL_S = float(os.environ.get('TOP_BOARD_TTL_S', '60'))
+ARCHIVE_MAX_ROWS = int(os.environ.get('ARCHIVE_MAX_ROWS', '10000'))
+ARCHIVE_GRACE_S = int(os.environ.get('ARCHIVE_GRACE_S', '300'))
+ARCHIVE_MAX_AGE_S = int(os.environ.get('ARCHIVE_MAX_AGE_S', '300'))
+SCORE_RETENTION_DAYS = int(os.environ.get('SCORE_RETENTION_DAYS', '14'))
+SCORE_KEEP_TOP = int(os.environ.get('SCORE_KEEP_TOP', '100'))
+SCORE_QUEUE_MAX = int(os.environ.get('SCORE_QUEUE_MAX', '5000'))
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', '200'))
+SCORE_FLUSH_INTERVAL_S = float(os.environ.get('SCORE_FLUSH_INTERVAL_S', '0.25'))
+# Scores storage rejects outright, as NDJSON /admin/import accepts once fixed up
+SCORE_DEAD_LETTER_FILE = os.environ.get('SCORE_DEAD_LETTER_FILE', str(ROOT_DIR / 'score_dead_letters.ndjson'))
+DAILY_PREWARM_S = int(os.environ.get('DAILY_PREWARM_S', '60'))
+CONTENT_CACHE_TTL_S = float(os.environ.get('CONTENT_CACHE_TTL_S', '30'))
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', str(os.cpu_count() or 2)))
+STATS_FLUSH_INTERVAL_S = float(os.environ.get('STATS_FLUSH_INTERVAL_S', '30'))
+LIVE_FEED_TOP_N = int(os.environ.get('LIVE_FEED_TOP_N', '50'))
+LIVE_FEED_BUFFER = int(os.environ.get('LIVE_FEED_BUFFER', '64'))
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_INTERVAL_S = float(os.environ.get('PROFILE_INTERVAL_S', '0.001'))
+PROFILE_BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER_SIZE', '50'))
+TRACE_FILE = os.environ.get('TRACE_FILE', '')
+TRACE_FILE_MAX_BYTES = int(os.environ.get('TRACE_FILE_MAX_BYTES', str(50 * 1024 * 1024)))
+TRACE_FILE_BACKUPS = int(os.environ.get('TRACE_FILE_BACKUPS', '5'))
+MONGO_WRITE_POOL_SIZE = int(os.environ.get('MONGO_WRITE_POOL_SIZE', '100'))
+MONGO_READ_POOL_SIZE = int(os.environ.get('MONGO_READ_POOL_SIZE', '100'))
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'secondaryPreferred')
+MONGO_MAX_STALENESS_S = int(os.environ.get('MONGO_MAX_STALENESS_S', '90'))  # driver minimum is 90
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_SLOW_CALL_S = float(os.environ.get('BREAKER_SLOW_CALL_S', '1.0'))
+BREAKER_RESET_S = float(os.environ.get('BREAKER_RESET_S', '10'))
+BREAKER_CALL_TIMEOUT_S = float(os.environ.get('BREAKER_CALL_TIMEOUT_S', '5'))
+# Batch writes and archive freezes are slow by nature and get their own limits
+BREAKER_BULK_SLOW_CALL_S = float(os.environ.get('BREAKER_BULK_SLOW_CALL_S', '15'))
+BREAKER_BULK_TIMEOUT_S = float(os.environ.get('BREAKER_BULK_TIMEOUT_S', '60'))
+STALE_PAGE_CACHE_SIZE = int(os.environ.get('STALE_PAGE_CACHE_SIZE', '256'))
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '64'))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '256'))
+ADMISSION_QUEUE_TIMEOUT_S = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_S', '1.0'))
+ADMISSION_RETRY_AFTER_S = int(os.environ.get('ADMISSION_RETRY_AFTER_S', '1'))
+SUBMIT_RATE_LIMIT = os.environ.get('SUBMIT_RATE_LIMIT', '10/minute')
+RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS', '65536'))
+RATE_LIMIT_PATH = os.environ.get(
+    'RATE_LIMIT_PATH',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'exit_or_die_ratelimit')
+)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')  # mongo, memory or sqlite
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '8001'))
+WORKERS = int(os.environ.get('WORKERS', '1'))  # more than 1 runs pre-forked workers on one socket
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'exit_or_die.db'))
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_RATE_LIMIT = int(os.environ.get('LOG_RATE_LIMIT', '50'))  # records per second per message type
+# e.g. "score_submitted=0.1,leaderboard_miss=0.01"
+LOG_SAMPLE_RATES = {
+    key.strip(): float(rate)
+    for key, rate in (pair.split('=', 1) for pair in os.environ.get('LOG_SAMPLE_RATES', '').split(',') if '=' in pair)
+}
+
+# === METRICS ===
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+class MetricsRegistry:
+    """Prometheus counters/histograms; locked, since log handlers update them off the loop"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, list] = {}
+        self.bucket_sets: Dict[str, tuple] = {}
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def observe(self, name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+        key = (name, tuple(labels.items()))
+        index = bisect.bisect_left(buckets, value)
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                self.bucket_sets[name] = buckets
+                series = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            if index < len(buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+    
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.histograms.items())
+        lines = []
+        for (name, labels), value in counters:
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(self.bucket_sets[name], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+metrics = MetricsRegistry()
+
+# === TRACING ===
+
+current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_span", default=None)
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class SpanExporter:
+    """Writes finished spans as OTLP/JSON lines to a rotating local file.
+
+    export() only appends to a deque, so it is safe from the event loop and
+    from driver threads; a background thread does the file I/O.
+    """
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.enabled = bool(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue: deque = deque(maxlen=100000)
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+    
+    def export(self, span: Dict[str, Any]):
+        self.queue.append(span)
+    
+    def start(self):
+        if self.enabled and self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="span-exporter", daemon=True)
+            self.thread.start()
+    
+    def run(self):
+        while not self.stop_event.wait(1.0):
+            self.flush()
+    
+    def flush(self):
+        spans = []
+        while self.queue:
+            spans.append(self.queue.popleft())
+        if not spans:
+            return
+        for span in spans:
+            span["attributes"] = [{"key": key, "value": otlp_value(value)} for key, value in span["attributes"].items()]
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": "exit-or-die-api"}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}}
+                ]},
+                "scopeSpans": [{"scope": {"name": "exit_or_die"}, "spans": spans}]
+            }]
+        }
+        try:
+            self.rotate()
+            with open(self.path, "a") as trace_file:
+                trace_file.write(json.dumps(payload, separators=(',', ':')) + "\n")
+        except OSError as e:
+            logger.error("Error writing spans: %s", e)
+    
+    def rotate(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.max_bytes:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+    
+    def close(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.enabled:
+            self.flush()
+
+span_exporter = SpanExporter(TRACE_FILE, TRACE_FILE_MAX_BYTES, TRACE_FILE_BACKUPS)
+
+def start_span(name: str, parent: Optional[Dict[str, Any]] = None, **attributes) -> Dict[str, Any]:
+    return {
+        "traceId": parent["traceId"] if parent else os.urandom(16).hex(),
+        "spanId": os.urandom(8).hex(),
+        "parentSpanId": parent["spanId"] if parent else "",
+        "name": name,
+        "kind": 1,
+        "startTimeUnixNano": str(time.time_ns()),
+        "attributes": attributes
+    }
+
+def end_span(span: Dict[str, Any], error: Optional[BaseException] = None):
+    span["endTimeUnixNano"] = str(time.time_ns())
+    if error is not None and not (isinstance(error, HTTPException) and error.status_code < 500):
+        span["status"] = {"code": 2, "message": f"{type(error).__name__}: {error}"[:200]}
+
+@contextmanager
+def trace_span(name: str, parent: Optional[Dict[str, Any]] = None, **attributes):
+    """Span around a block; children started inside it (including other tasks) nest under it"""
+    if not span_exporter.enabled:
+        yield None
+        return
+    span = start_span(name, parent or current_span.get(), **attributes)
+    token = current_span.set(span)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        current_span.reset(token)
+        end_span(span, error)
+        span_exporter.export(span)
+
+def parse_traceparent(value: str) -> Optional[Dict[str, Any]]:
+    """Parent context from a W3C traceparent header"""
+    parts = value.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return {"traceId": parts[1], "spanId": parts[2]}
+    return None
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Times and traces Mongo commands; runs on driver threads so it only appends to deques"""
+    def __init__(self):
+        self.collections: Dict[int, tuple] = {}
+        self.samples: deque = deque(maxlen=100000)
+    
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        collection = collection if isinstance(collection, str) else ""
+        span = None
+        if span_exporter.enabled:
+            # Motor copies the caller's context onto the driver thread
+            span = start_span(f"mongo.{event.command_name}", current_span.get(),
+                              **{"db.system": "mongodb", "db.operation": event.command_name, "db.mongodb.collection": collection})
+        self.collections[event.request_id] = (collection, span)
+    
+    def succeeded(self, event):
+        self.record(event)
+    
+    def failed(self, event):
+        self.record(event)
+    
+    def record(self, event):
+        collection, span = self.collections.pop(event.request_id, ("", None))
+        self.samples.append((collection, event.command_name, event.duration_micros / 1e6))
+        if span:
+            span["endTimeUnixNano"] = str(time.time_ns())
+            if isinstance(event, monitoring.CommandFailedEvent):
+                span["status"] = {"code": 2, "message": str(event.failure)[:200]}
+            span_exporter.export(span)
+    
+    def drain(self):
+        """Move samples into the registry (called on the event loop)"""
+        while self.samples:
+            collection, operation, seconds = self.samples.popleft()
+            metrics.observe("mongo_operation_seconds", seconds, collection=collection, operation=operation)
+
+mongo_metrics_listener = MongoMetricsListener()
+
+@contextmanager
+def submit_stage(stage: str):
+    """Time and trace one stage of submit_score"""
+    with metrics.timer("submit_stage_seconds", stage=stage), trace_span(f"submit.{stage}"):
+        yield
+
+# === PROFILING ===
+
+def fold_stack(frame) -> str:
+    """Collapse a frame chain into a root-first flamegraph stack"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class RequestProfiler:
+    """Stack sampler for opted-in requests, keeping the last N profiles in a ring buffer.
+
+    A sampler thread runs only while a profiled request is in flight. It samples
+    the event-loop thread, so overlapping requests show up in each other's profiles.
+    """
+    def __init__(self, interval: float, buffer_size: int):
+        self.interval = interval
+        self.profiles: deque = deque(maxlen=buffer_size)
+        self.active: Dict[int, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.next_id = 0
+    
+    def start(self, route: str) -> Dict[str, Any]:
+        with self.lock:
+            self.next_id += 1
+            profile = {
+                "id": self.next_id,
+                "route": route,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "started": time.perf_counter(),
+                "thread_id": threading.get_ident(),
+                "samples": {}
+            }
+            self.active[profile["id"]] = profile
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.sample_loop, name="request-profiler", daemon=True)
+                self.thread.start()
+        return profile
+    
+    def stop(self, profile: Dict[str, Any]):
+        with self.lock:
+            self.active.pop(profile["id"], None)
+            profile["duration_ms"] = round((time.perf_counter() - profile.pop("started")) * 1000, 3)
+            self.profiles.append(profile)
+    
+    def sample_loop(self):
+        while True:
+            with self.lock:
+                if not self.active:
+                    self.thread = None
+                    return
+                frames = sys._current_frames()
+                for profile in self.active.values():
+                    frame = frames.get(profile["thread_id"])
+                    if frame is not None:
+                        stack = fold_stack(frame)
+                        profile["samples"][stack] = profile["samples"].get(stack, 0) + 1
+            time.sleep(self.interval)
+    
+    def folded(self, profile_id: Optional[int] = None) -> str:
+        """Profiles in folded-stack format, rooted at the request route"""
+        lines = []
+        with self.lock:
+            for profile in self.profiles:
+                if profile_id is not None and profile["id"] != profile_id:
+                    continue
+                for stack, count in profile["samples"].items():
+                    lines.append(f"{profile['route']};{stack} {count}")
+        return "\n".join(lines) + "\n"
+
+profiler = RequestProfiler(PROFILE_INTERVAL_S, PROFILE_BUFFER_SIZE)
+
+# MongoDB connection
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+client = AsyncIOMotorClient(mongo_url, maxPoolSize=MONGO_WRITE_POOL_SIZE, event_listeners=[mongo_metrics_listener])
+db = client[os.environ.get('DB_NAME', 'exit_or_die')]
+
+# Leaderboard, content and stats reads use their own pool and may hit secondaries
+read_options = {"readPreference": MONGO_READ_PREFERENCE}
+if MONGO_READ_PREFERENCE != "primary" and MONGO_MAX_STALENESS_S > 0:
+    read_options["maxStalenessSeconds"] = MONGO_MAX_STALENESS_S
+read_client = AsyncIOMotorClient(
+    os.environ.get('MONGO_READ_URL', mongo_url),
+    maxPoolSize=MONGO_READ_POOL_SIZE,
+    event_listeners=[mongo_metrics_listener],
+    **read_options
+)
+read_db = read_client[db.name]
 
 # Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+def parse_rate(limit: str) -> tuple:
+    """'10/minute' -> (tokens per second, burst capacity)"""
+    count, period = limit.split("/")
+    seconds = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}[period.strip()]
+    return int(count) / seconds, int(count)
+
+class SharedRateLimiter:
+    """Token buckets in a memory-mapped table shared by every worker on the host.
+
+    A key hashes to one set of WAYS slots. Each set is guarded by an fcntl
+    byte-range lock on its own offset, so workers only contend on the same
+    set and check-and-update is O(1). A full set reuses its least recently
+    touched slot; a bucket idle long enough to refill loses nothing.
+    """
+    WAYS = 4
+    SLOT = struct.Struct("Qdd")  # key hash, tokens, last update (unix time)
+    
+    def __init__(self, path: str, slots: int):
+        self.enabled = True
+        self.sets = max(1, slots // self.WAYS)
+        self.set_size = self.WAYS * self.SLOT.size
+        size = self.sets * self.set_size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.table = mmap.mmap(self.fd, size)
+    
+    def acquire(self, key: str, rate: float, capacity: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available"""
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        base = (key_hash % self.sets) * self.set_size
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, self.set_size, base)
+        try:
+            now = time.time()
+            victim, victim_updated = base, math.inf
+            for offset in range(base, base + self.set_size, self.SLOT.size):
+                slot_key, tokens, updated = self.SLOT.unpack_from(self.table, offset)
+                if slot_key == key_hash:
+                    break
+                if updated < victim_updated:
+                    victim, victim_updated = offset, updated
+            else:
+                if victim_updated + capacity / rate > now:
+                    metrics.inc("rate_limit_evictions_total")
+                offset, tokens, updated = victim, capacity, now
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self.SLOT.pack_into(self.table, offset, key_hash, tokens, now)
+            return wait
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, self.set_size, base)
+
+limiter = SharedRateLimiter(RATE_LIMIT_PATH, RATE_LIMIT_SLOTS)
+
+# Per-client limits by path
+RATE_LIMITS = {
+    "/api/score/submit": SUBMIT_RATE_LIMIT,
+}
 
 # Create the main app
 app = FastAPI(
@@ -43,24 +514,316 @@ app = FastAPI(
 # Create API router
 api_router = APIRouter(prefix="/api")
 
-# CORS setup
+class MetricsMiddleware:
+    """ASGI middleware recording latency and payload sizes per route"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        sizes = {"request": 0, "response": 0}
+        status = {"code": 500}
+        
+        async def counting_receive():
+            message = await receive()
+            sizes["request"] += len(message.get("body", b""))
+            return message
+        
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # Route template, not raw path, to keep label cardinality bounded.
+            # Shed and rate-limited requests never reach the router, but only
+            # fixed paths are guarded, so those paths are their own templates
+            route = scope.get("route")
+            if route:
+                path = route.path
+            elif scope["path"] in ADMISSION_PRIORITIES or scope["path"] in RATE_LIMITS:
+                path = scope["path"]
+            else:
+                path = "unmatched"
+            metrics.observe("http_request_seconds", time.perf_counter() - started, route=path)
+            metrics.observe("http_request_bytes", sizes["request"], SIZE_BUCKETS, route=path)
+            metrics.observe("http_response_bytes", sizes["response"], SIZE_BUCKETS, route=path)
+            metrics.inc("http_requests_total", route=path, status=status["code"])
+
+class ProfilingMiddleware:
+    """Profiles a sampled fraction of requests, or any with a valid X-Profile admin header"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            return await self.app(scope, receive, send)
+        profile = profiler.start(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop(profile)
+    
+    def should_profile(self, scope) -> bool:
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return True
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value, ADMIN_API_KEY.encode())
+        return False
+
+app.add_middleware(ProfilingMiddleware)
+
+class TracingMiddleware:
+    """Root span per HTTP request, continuing an incoming traceparent"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not span_exporter.enabled:
+            return await self.app(scope, receive, send)
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode())
+        status = {"code": 500}
+        
+        async def status_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        with trace_span("HTTP", parent, **{"http.method": scope["method"], "http.target": scope["path"]}) as span:
+            try:
+                await self.app(scope, receive, status_send)
+            finally:
+                route = scope.get("route")
+                span["name"] = f"{scope['method']} {route.path if route else 'unmatched'}"
+                span["attributes"]["http.status_code"] = status["code"]
+
+app.add_middleware(TracingMiddleware)
+
+class AdmissionController:
+    """In-flight cap shared by expensive endpoints, with a priority wait queue.
+
+    A freed slot goes to the highest priority waiter (lowest number); waiters
+    that can't get a slot within the queue timeout are shed.
+    """
+    def __init__(self, limit: int, queue_limit: int, queue_timeout_s: float):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.queue_timeout_s = queue_timeout_s
+        self.in_flight = 0
+        self.waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self.seq = 0
+    
+    async def acquire(self, priority: int) -> bool:
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            return True
+        if len(self.waiters) >= self.queue_limit:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.seq += 1
+        heapq.heappush(self.waiters, (priority, self.seq, waiter))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # Disconnected after being handed a slot
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+    
+    def release(self):
+        """Hand the slot to the best live waiter, or free it"""
+        while self.waiters:
+            _, _, waiter = heapq.heappop(self.waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+admission = AdmissionController(ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT_S)
+
+# Endpoints that hit storage or run simulations; health, content and daily are
+# served from memory and always bypass admission. Reads outrank submissions.
+ADMISSION_PRIORITIES = {
+    "/api/leaderboard": 0,
+    "/api/leaderboard/around": 0,
+    "/api/leaderboard/me": 0,
+    "/api/stats": 0,
+    "/api/score/submit": 1,
+}
+
+class AdmissionMiddleware:
+    """Sheds expensive requests with 503 when the worker is saturated"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        priority = None
+        # Preflights are cheap and answered by CORS; they don't take an in-flight slot
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            priority = ADMISSION_PRIORITIES.get(scope["path"])
+        if priority is None:
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        if not await admission.acquire(priority):
+            metrics.inc("admission_shed_total", path=scope["path"])
+            response = Response(
+                dump_json({"detail": "Server busy"}),
+                status_code=503,
+                media_type="application/json",
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)}
+            )
+            return await response(scope, receive, send)
+        metrics.observe("admission_wait_seconds", time.perf_counter() - started, path=scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
+
+app.add_middleware(AdmissionMiddleware)
+
+class RateLimitMiddleware:
+    """Per-client token bucket limits, checked before admission"""
+    def __init__(self, app):
+        self.app = app
+        self.rates = {path: parse_rate(limit) for path, limit in RATE_LIMITS.items()}
+    
+    async def __call__(self, scope, receive, send):
+        rate = None
+        # Preflights are answered by CORS and must not spend the client's tokens
+        if scope["type"] == "http" and scope["method"] != "OPTIONS" and limiter.enabled:
+            rate = self.rates.get(scope["path"])
+        if rate is None:
+            return await self.app(scope, receive, send)
+        client = scope.get("client")
+        wait = limiter.acquire(f"{scope['path']}:{client[0] if client else '127.0.0.1'}", *rate)
+        if not wait:
+            return await self.app(scope, receive, send)
+        metrics.inc("rate_limit_rejections_total", route=scope["path"])
+        response = Response(
+            dump_json({"error": f"Rate limit exceeded: {RATE_LIMITS[scope['path']]}"}),
+            status_code=429,
+            media_type="application/json",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+        await response(scope, receive, send)
+
+app.add_middleware(RateLimitMiddleware)
+
+# Outside admission and rate limiting so 429s, 503s and queue waits are measured
+app.add_middleware(MetricsMiddleware)
+
+# CORS setup; added last so it is outermost and 429/503 rejections carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=False,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Stale", "Retry-After"],
 )
 
-# Rate limiting middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+LOG_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "event"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields are emitted as top-level keys"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in LOG_RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class LogSampler(logging.Filter):
+    """Per message type sampling and rate cap, applied before a record is queued.
+
+    The type is the record's `event` extra, falling back to its format string.
+    Warnings and errors are never sampled out but still count against the cap.
+    """
+    def __init__(self, sample_rates: Dict[str, float], rate_limit: int):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limit = rate_limit
+        self.windows: Dict[str, list] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "event", None) or str(record.msg)
+        if record.levelno < logging.WARNING:
+            rate = self.sample_rates.get(key, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                metrics.inc("log_records_dropped_total", reason="sampled")
+                return False
+        second = int(record.created)
+        window = self.windows.get(key)
+        if window is None or window[0] != second:
+            if len(self.windows) > 1000:
+                self.windows.clear()
+            window = self.windows[key] = [second, 0]
+        window[1] += 1
+        if self.rate_limit and window[1] > self.rate_limit:
+            metrics.inc("log_records_dropped_total", reason="rate_limited")
+            return False
+        span = current_span.get()
+        if span:
+            record.trace_id = span["traceId"]
+            record.span_id = span["spanId"]
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records so formatting happens on the writer thread where it can"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A dict or list argument may change before the writer thread formats
+        # it (e.g. an import summary); render those now. A lone dict argument
+        # becomes record.args itself, so any dict args count as mutable
+        args = record.args
+        if args and (isinstance(args, dict) or not all(
+            isinstance(value, (str, int, float, bool, type(None))) for value in args
+        )):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total", reason="queue_full")
+
+def configure_logging() -> logging.handlers.QueueListener:
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.addFilter(LogSampler(LOG_SAMPLE_RATES, LOG_RATE_LIMIT))
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    listener.start()
+    return listener
+
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
 # === DATA MODELS ===
@@ -83,26 +846,9 @@ class Set(BaseModel):
     pieces: List[str]
     bonus: List[ArtifactEffect]
 
-class ContentPack(BaseModel):
-    version: str = "1.1.0"
-    active: bool = True
-    rarity_weights: Dict[str, float] = {
-        "Common": 40, "Uncommon": 22, "Rare": 12, "Epic": 8, "Mythic": 6,
-        "Ancient": 4, "Relic": 3, "Legendary": 2, "Transcendent": 1.5, "1/1": 1.5
-    }
-    hazard_curve: Dict[str, float] = {
-        "base": 2.0, "per_depth": 0.7, "per_greed": 0.8, "cap": 60
-    }
-    exit_curve: Dict[str, float] = {
-        "base": 5, "per_depth": 1, "per_greed": 0.5, "cap": 40
-    }
-    pity: Dict[str, int] = {
-        "no_drop_streak": 2, "bonus_next": 5
-    }
-    streak_chest: Dict[str, float] = {
-        "interval": 3, "rarity_boost_multiplier": 1.8
-    }
-    artifacts: List[Artifact] = [
+def default_artifacts() -> List[Artifact]:
+    """Built-in artifacts; built per pack on first use rather than at import"""
+    return [
         # Phoenix artifacts
         Artifact(id="phoenix", name="Phoenix Feather", rarity="Legendary", 
                 effects=[{"id": "revive_charges", "v": 1}],
@@ -163,6 +909,27 @@ class ContentPack(BaseModel):
                 lore="Gold calls to gold.",
                 lore_long="Lodestone blessed by ancient merchants. It pulls treasure from shadows like iron to magnet.")
     ]
+
+class ContentPack(BaseModel):
+    version: str = "1.1.0"
+    active: bool = True
+    rarity_weights: Dict[str, float] = {
+        "Common": 40, "Uncommon": 22, "Rare": 12, "Epic": 8, "Mythic": 6,
+        "Ancient": 4, "Relic": 3, "Legendary": 2, "Transcendent": 1.5, "1/1": 1.5
+    }
+    hazard_curve: Dict[str, float] = {
+        "base": 2.0, "per_depth": 0.7, "per_greed": 0.8, "cap": 60
+    }
+    exit_curve: Dict[str, float] = {
+        "base": 5, "per_depth": 1, "per_greed": 0.5, "cap": 40
+    }
+    pity: Dict[str, int] = {
+        "no_drop_streak": 2, "bonus_next": 5
+    }
+    streak_chest: Dict[str, float] = {
+        "interval": 3, "rarity_boost_multiplier": 1.8
+    }
+    artifacts: List[Artifact] = Field(default_factory=default_artifacts)
     sets: List[Set] = []
     value_multipliers: Dict[str, float] = {
         "Common": 1, "Uncommon": 1.2, "Rare": 1.5, "Epic": 2, "Mythic": 2.5,
@@ -309,7 +1076,7 @@ class SubmittedItem(BaseModel):
     lore: str = ""
 
 class ScoreSubmission(BaseModel):
-    username: Optional[str] = None
+    username: Optional[str] = Field(None, max_length=32)  # the client allows 16
     seed: str
     version: str
     daily: bool
@@ -328,6 +1095,7 @@ class Score(BaseModel):
     duration_s: int = 0
     artifacts: List[str]
     replay_digest: str
+    expire_at: Optional[datetime] = None  # daily rows only; TTL retention
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class Item(BaseModel):
@@ -351,6 +1119,28 @@ class LeaderboardResponse(BaseModel):
     rows: List[LeaderboardEntry]
     total: int
 
+class LeaderboardWindowResponse(BaseModel):
+    score: int
+    above: List[LeaderboardEntry]
+    below: List[LeaderboardEntry]
+
+class MetricStats(BaseModel):
+    count: int
+    p50: float
+    p90: float
+    p99: float
+    histogram: List[List[float]]  # [lower, upper, count]
+
+class StatsResponse(BaseModel):
+    board: str
+    metrics: Dict[str, MetricStats]
+
+class PlayerBestResponse(BaseModel):
+    username: str
+    score: int
+    rank: int
+    day: Optional[str] = None
+
 class DailyResponse(BaseModel):
     seed: str
     start: str
@@ -385,7 +1175,7 @@ class SeededRNG:
     def choice(self, items: List[Any]) -> Any:
         return items[self.next_int(0, len(items) - 1)]
     
-    def weighted_choice(self, items: List[Dict[str, Any]]) -> Any:
+    def weighted_choice(self, items: Sequence[Dict[str, Any]]) -> Any:
         total_weight = sum(item['weight'] for item in items)
         random = self.next_float(0, total_weight)
         
@@ -396,11 +1186,46 @@ class SeededRNG:
         
         return items[-1]['item']
 
+RARITY_BASE_VALUES = {
+    "Common": 50, "Uncommon": 100, "Rare": 200, "Epic": 500, "Mythic": 1000,
+    "Ancient": 2000, "Relic": 4000, "Legendary": 8000, "Transcendent": 15000, "1/1": 30000
+}
+
+class PackTables:
+    """Loot tables derived from a content pack once per load instead of on every roll"""
+    __slots__ = ("rarity_items", "pity_rarity_items", "item_values")
+    
+    def __init__(self, content_pack: ContentPack):
+        weights = content_pack.rarity_weights
+        self.rarity_items = tuple({"item": rarity, "weight": weight} for rarity, weight in weights.items())
+        # Pity halves Common and boosts everything else
+        self.pity_rarity_items = tuple(
+            {"item": rarity, "weight": weight * (0.5 if rarity == "Common" else 1.2)}
+            for rarity, weight in weights.items()
+        )
+        self.item_values = {
+            rarity: int(RARITY_BASE_VALUES.get(rarity, 50) * content_pack.value_multipliers.get(rarity, 1))
+            for rarity in weights
+        }
+
+# Tables for the last pack seen that isn't the active one (an import chunk's, a benchmark's)
+other_pack_tables: tuple = (None, None)
+
+def get_pack_tables(content_pack: ContentPack) -> PackTables:
+    """Tables are built once per pack object, not once per simulator"""
+    global other_pack_tables
+    if content_cache.get("pack") is content_pack:
+        return content_cache["tables"]
+    if other_pack_tables[0] is not content_pack:
+        other_pack_tables = (content_pack, PackTables(content_pack))
+    return other_pack_tables[1]
+
 class GameSimulator:
     """Server-side game simulation for score validation"""
     
-    def __init__(self, content_pack: ContentPack, seed: str):
+    def __init__(self, content_pack: ContentPack, seed: str, tables: Optional[PackTables] = None):
         self.content = content_pack
+        self.tables = tables or get_pack_tables(content_pack)
         self.rng = SeededRNG(seed)
         self.hp = 3
         self.max_hp = 3
@@ -443,29 +1268,13 @@ class GameSimulator:
         return self.rng.next() < base_chance
     
     def generate_loot(self) -> SubmittedItem:
-        # Roll rarity
-        rarity_items = [
-            {"item": rarity, "weight": weight}
-            for rarity, weight in self.content.rarity_weights.items()
-        ]
-        
-        # Apply pity system bonus
+        # Roll rarity, with the pity system bonus after a drought
         if self.rooms_since_loot >= self.content.pity["no_drop_streak"]:
-            for item in rarity_items:
-                if item["item"] == "Common":
-                    item["weight"] *= 0.5
-                else:
-                    item["weight"] *= 1.2
-        
-        rarity = self.rng.weighted_choice(rarity_items)
-        
-        # Generate item
-        base_value = {
-            "Common": 50, "Uncommon": 100, "Rare": 200, "Epic": 500, "Mythic": 1000,
-            "Ancient": 2000, "Relic": 4000, "Legendary": 8000, "Transcendent": 15000, "1/1": 30000
-        }.get(rarity, 50)
+            rarity = self.rng.weighted_choice(self.tables.pity_rarity_items)
+        else:
+            rarity = self.rng.weighted_choice(self.tables.rarity_items)
         
-        value = int(base_value * self.content.value_multipliers.get(rarity, 1))
+        value = self.tables.item_values[rarity]
         
         # Generate hash (deterministic)
         hash_data = f"{self.content.version}:{self.depth}:{self.rng.state}:{rarity}"
@@ -542,9 +1351,9 @@ class GameSimulator:
 
 # === UTILITY FUNCTIONS ===
 
-def generate_daily_seed() -> str:
+def generate_daily_seed(now: Optional[datetime] = None) -> str:
     """Generate deterministic daily seed"""
-    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    today = (now or datetime.now(timezone.utc)).strftime('%Y-%m-%d')
     seed_bytes = hmac.new(
         DAILY_SECRET.encode(),
         today.encode(),
@@ -552,21 +1361,165 @@ def generate_daily_seed() -> str:
     ).digest()
     return seed_bytes.hex()[:16]
 
-def get_daily_timeframe() -> tuple:
+def get_daily_timeframe(now: Optional[datetime] = None) -> tuple:
     """Get daily timeframe start/end"""
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
     start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     end = start + timedelta(days=1)
     return start, end
 
+def get_board_key(daily: bool, day: Optional[str] = None) -> str:
+    """Get leaderboard board key (all-time or per-day daily board)"""
+    if daily:
+        return f"daily:{day or datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
+    return "all"
+
+async def ensure_indexes():
+    """Create indexes used by leaderboard queries"""
+    # Board ranges sorted by score (pages, placement, around-me windows)
+    await db.scores.create_index([("daily", 1), ("day", 1), ("score", -1)])
+    await db.scores.create_index("replay_digest")
+    await db.items.create_index("hash")
+    await db.daily_archives.create_index("day", unique=True)
+    
+    # One best-score row per player per board, ranked by score
+    await db.player_bests.create_index([("board", 1), ("username", 1)], unique=True)
+    await db.player_bests.create_index([("board", 1), ("score", -1)])
+    
+    # Daily rows outside a day's top are dropped once their retention ends
+    await db.scores.create_index("expire_at", expireAfterSeconds=0)
+
+async def backfill_replay_digests():
+    """Seed the digest registry from db.scores on first deploy"""
+    if await db.replay_digests.estimated_document_count() > 0:
+        return
+    if await db.scores.estimated_document_count() == 0:
+        return
+    await db.scores.aggregate([
+        {"$project": {"_id": "$replay_digest", "created_at": 1}},
+        {"$merge": {"into": "replay_digests", "whenMatched": "keepExisting"}}
+    ]).to_list(length=None)
+    logger.info("Backfilled replay digest registry")
+
+def player_best_update(board: str, username: str, score: int) -> UpdateOne:
+    """Atomic upsert raising the player's best score on a board"""
+    return UpdateOne(
+        {"board": board, "username": username},
+        {
+            "$max": {"score": score},
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        },
+        upsert=True
+    )
+
+def get_score_expiry(day: str) -> datetime:
+    """Retention deadline for a daily board's raw rows"""
+    start = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return start + timedelta(days=1 + SCORE_RETENTION_DAYS)
+
+def build_board_query(daily: bool, day: Optional[str] = None) -> Dict[str, Any]:
+    """Build db.scores filter for a board; (daily, day) is the partition key"""
+    if daily:
+        return {"daily": True, "day": day or datetime.now(timezone.utc).strftime('%Y-%m-%d')}
+    return {"daily": False}
+
+# Only the fields a LeaderboardEntry is built from
+LEADERBOARD_PROJECTION = {"_id": 0, "username": 1, "score": 1, "depth": 1, "artifacts": 1, "day": 1, "created_at": 1}
+
+def format_leaderboard_row(score: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a db.scores row in the LeaderboardEntry shape"""
+    created_at = score["created_at"]
+    if created_at.tzinfo is None:
+        # Mongo hands back naive UTC; rows accepted in-process are aware. One
+        # page mixes both, so every row is serialized the same way (with Z)
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return {
+        "username": score.get("username", "Anonymous"),
+        "score": score["score"],
+        "depth": score["depth"],
+        "artifacts": len(score["artifacts"]),
+        "day": score.get("day"),
+        "created_at": created_at
+    }
+
+def encode_json_value(value: Any) -> Any:
+    """JSON fallback matching pydantic's datetime format (UTC as Z)"""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    return str(value)
+
+def dump_json(content: Any) -> bytes:
+    """Serialize plain dicts/lists (datetimes allowed) to JSON bytes"""
+    if orjson:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=encode_json_value, ensure_ascii=False, separators=(',', ':')).encode()
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response for pre-shaped data, skipping response_model re-validation"""
+    return Response(dump_json(content), media_type="application/json", headers=headers)
+
 def calculate_replay_digest(replay_log: ReplayLog) -> str:
     """Calculate SHA256 digest of replay log"""
     canonical = json.dumps(replay_log.dict(), sort_keys=True, separators=(',', ':'))
     return hashlib.sha256(canonical.encode()).hexdigest()
 
-async def get_active_content_pack() -> ContentPack:
-    """Get the active content pack"""
-    pack_data = await db.content_packs.find_one({"active": True})
+def verify_admin_key(x_api_key: str):
+    """Reject requests without the admin API key"""
+    if not hmac.compare_digest(x_api_key.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+def encode_export_value(value: Any) -> Any:
+    """JSON fallback for BSON values in exported rows"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+content_cache: Dict[str, Any] = {}
+
+def cache_content_pack(content_pack: ContentPack, key: Optional[tuple] = None) -> ContentPack:
+    """Keep the active pack, its loot tables and its serialized /content body in memory
+
+    key is the pack's active_pack_key; None makes the next revalidation reload it.
+    """
+    content_cache["key"] = key
+    if content_cache.get("pack") != content_pack:
+        content_cache["pack"] = content_pack
+        content_cache["tables"] = PackTables(content_pack)
+        # Encoded once per load, in exactly the shape the dict response had
+        content_cache["body"] = dump_json(jsonable_encoder(content_pack.dict()))
+    # An unchanged reload keeps the existing objects, which a pre-fork master
+    # may have built and shared with every worker copy-on-write
+    content_cache["loaded_at"] = time.monotonic()
+    content_cache["stale"] = False
+    return content_cache["pack"]
+
+async def get_active_content_pack(revalidate: bool = False) -> ContentPack:
+    """Get the active content pack; revalidate checks storage even within the TTL"""
+    if content_cache and not revalidate and time.monotonic() - content_cache["loaded_at"] < CONTENT_CACHE_TTL_S:
+        metrics.inc("cache_requests_total", cache="content", result="hit")
+        return content_cache["pack"]
+    try:
+        # Look up only the active pack's id and version; the pack itself is
+        # reloaded once another worker's /admin/content has replaced it
+        key = await storage.active_pack_key()
+        if content_cache and content_cache["key"] is not None and key == content_cache["key"]:
+            metrics.inc("cache_requests_total", cache="content", result="revalidated")
+            content_cache["loaded_at"] = time.monotonic()
+            content_cache["stale"] = False
+            return content_cache["pack"]
+        metrics.inc("cache_requests_total", cache="content", result="miss")
+        return cache_content_pack(await load_active_content_pack(), key)
+    except StorageUnavailable:
+        if not content_cache:
+            raise
+        metrics.inc("stale_responses_total", cache="content")
+        content_cache["stale"] = True
+        return content_cache["pack"]
+
+async def load_active_content_pack(source: Optional["Storage"] = None) -> ContentPack:
+    """Load (creating the default if missing) the active content pack"""
+    source = source or storage
+    pack_data = await source.get_active_pack()
     if not pack_data:
         # Create updated content pack v1.0.2
         default_pack = ContentPack()
@@ -632,67 +1585,1485 @@ async def get_active_content_pack() -> ContentPack:
             )
         ]
         
-        await db.content_packs.insert_one(default_pack.dict())
+        await source.set_active_pack(default_pack.dict())
         return default_pack
     
     return ContentPack(**pack_data)
 
-# === API ENDPOINTS ===
+# === STORAGE ===
 
-@api_router.get("/health", response_model=HealthResponse)
-async def health():
-    """Health check endpoint"""
-    return HealthResponse()
+class Storage(ABC):
+    """Score store operations used by the request path.
 
-@api_router.get("/content")
-async def get_content():
-    """Get active content pack"""
-    try:
-        content_pack = await get_active_content_pack()
-        return content_pack.dict()
-    except Exception as e:
-        logger.error(f"Error fetching content pack: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch content pack")
+    MongoStorage is the production backend; MemoryStorage and SqliteStorage
+    let single-node deployments and tests run without MongoDB. Archives,
+    player bests, stats sketches, retention and admin export/import still
+    talk to MongoDB directly and are disabled on the other backends.
+    """
+    name = "base"
+    # Errors that mean the store is unhealthy, as opposed to a bad request
+    errors: tuple = ()
+    
+    async def connect(self):
+        pass
+    
+    async def close(self):
+        pass
+    
+    @abstractmethod
+    async def get_active_pack(self) -> Optional[Dict[str, Any]]:
+        ...
+    
+    @abstractmethod
+    async def set_active_pack(self, doc: Dict[str, Any]):
+        """Store doc as the only active pack"""
+    
+    @abstractmethod
+    async def active_pack_key(self) -> Optional[tuple]:
+        """(id, version) of the active pack; cheap enough to check on every cache revalidation"""
+    
+    @abstractmethod
+    async def has_digest(self, digest: str) -> bool:
+        ...
+    
+    @abstractmethod
+    async def claim_digest(self, digest: str) -> bool:
+        """Atomically register a replay digest; False if it was already claimed"""
+    
+    @abstractmethod
+    async def release_digest(self, digest: str):
+        ...
+    
+    @abstractmethod
+    async def insert_scores(self, docs: List[Dict[str, Any]]):
+        """Insert score docs; rows already written by an earlier attempt are skipped"""
+    
+    @abstractmethod
+    async def written_digests(self, digests: List[str]) -> set:
+        """The replay digests among these whose score rows are stored"""
+    
+    @abstractmethod
+    async def item_exists(self, item_hash: str) -> bool:
+        ...
+    
+    @abstractmethod
+    async def mint_items(self, docs: List[Dict[str, Any]]):
+        """Insert item docs; hashes that already exist are skipped"""
+    
+    @abstractmethod
+    async def count_board(self, daily: bool, day: Optional[str] = None, primary: bool = False) -> int:
+        """Rows on the board; primary skips replica reads that may lag"""
+    
+    @abstractmethod
+    async def count_above(self, daily: bool, day: Optional[str], score: int) -> int:
+        """Rows on the board scoring strictly higher (rank is this + 1)"""
+    
+    @abstractmethod
+    async def page(self, daily: bool, day: Optional[str], offset: int, limit: int, primary: bool = False) -> List[Dict[str, Any]]:
+        """Leaderboard rows (LEADERBOARD_PROJECTION fields) by score descending"""
 
-@api_router.post("/admin/content")
-async def admin_update_content(
-    content_pack: ContentPack,
-    x_api_key: str = Header(...)
-):
-    """Admin endpoint to update content pack"""
-    if x_api_key != ADMIN_API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+class MongoStorage(Storage):
+    """Writes, duplicate checks, placement and top-board reloads use the primary; board pages use read_db"""
+    name = "mongo"
+    errors = (ConnectionFailure, ExecutionTimeout)
     
-    try:
-        # Deactivate all existing packs
-        await db.content_packs.update_many({}, {"$set": {"active": False}})
-        
-        # Insert new active pack
-        content_pack.active = True
-        content_pack.created_at = datetime.now(timezone.utc)
-        await db.content_packs.insert_one(content_pack.dict())
-        
-        logger.info(f"Content pack updated to version {content_pack.version}")
-        return {"status": "success", "version": content_pack.version}
+    def __init__(self, database, read_database=None):
+        self.db = database
+        self.read_db = read_database if read_database is not None else database
     
-    except Exception as e:
-        logger.error(f"Error updating content pack: {e}")
-        raise HTTPException(status_code=500, detail="Failed to update content pack")
+    async def connect(self):
+        # Fail startup (not the first request) if either pool can't reach a server
+        await self.db.command("ping")
+        if self.read_db is not self.db:
+            await self.read_db.command("ping")
+    
+    async def get_active_pack(self) -> Optional[Dict[str, Any]]:
+        # Loaded only when active_pack_key changed, which a lagging secondary may not show yet
+        return await self.db.content_packs.find_one({"active": True})
+    
+    async def set_active_pack(self, doc: Dict[str, Any]):
+        await self.db.content_packs.update_many({}, {"$set": {"active": False}})
+        await self.db.content_packs.insert_one(doc)
+    
+    async def active_pack_key(self) -> Optional[tuple]:
+        doc = await self.db.content_packs.find_one({"active": True}, {"_id": 1, "version": 1})
+        return (str(doc["_id"]), doc.get("version")) if doc else None
+    
+    async def has_digest(self, digest: str) -> bool:
+        return await self.db.replay_digests.find_one({"_id": digest}) is not None
+    
+    async def claim_digest(self, digest: str) -> bool:
+        try:
+            await self.db.replay_digests.insert_one({"_id": digest, "created_at": datetime.now(timezone.utc)})
+            return True
+        except DuplicateKeyError:
+            return False
+    
+    async def release_digest(self, digest: str):
+        await self.db.replay_digests.delete_one({"_id": digest})
+    
+    async def insert_scores(self, docs: List[Dict[str, Any]]):
+        await insert_ignoring_duplicates(self.db.scores, docs)
+    
+    async def written_digests(self, digests: List[str]) -> set:
+        return set(await self.db.scores.distinct("replay_digest", {"replay_digest": {"$in": digests}}))
+    
+    async def item_exists(self, item_hash: str) -> bool:
+        return await self.db.items.find_one({"hash": item_hash}) is not None
+    
+    async def mint_items(self, docs: List[Dict[str, Any]]):
+        await insert_ignoring_duplicates(self.db.items, docs)
+    
+    async def count_board(self, daily: bool, day: Optional[str] = None, primary: bool = False) -> int:
+        database = self.db if primary else self.read_db
+        return await database.scores.count_documents(build_board_query(daily, day))
+    
+    async def count_above(self, daily: bool, day: Optional[str], score: int) -> int:
+        return await self.db.scores.count_documents({**build_board_query(daily, day), "score": {"$gt": score}})
+    
+    async def page(self, daily: bool, day: Optional[str], offset: int, limit: int, primary: bool = False) -> List[Dict[str, Any]]:
+        database = self.db if primary else self.read_db
+        cursor = database.scores.find(build_board_query(daily, day), LEADERBOARD_PROJECTION).sort("score", -1)
+        return await cursor.skip(offset).limit(limit).to_list(length=limit)
 
-@api_router.get("/daily", response_model=DailyResponse)
-async def get_daily():
-    """Get daily seed and timeframe"""
-    try:
-        seed = generate_daily_seed()
-        start, end = get_daily_timeframe()
-        
-        return DailyResponse(
-            seed=seed,
-            start=start.isoformat(),
-            end=end.isoformat()
-        )
-    except Exception as e:
-        logger.error(f"Error generating daily seed: {e}")
+class MemoryStorage(Storage):
+    """Process-local store; boards are kept sorted so rank and page are bisects and slices"""
+    name = "memory"
+    
+    def __init__(self):
+        self.packs: List[Dict[str, Any]] = []
+        self.digests: set = set()
+        self.written: set = set()
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.boards: Dict[str, tuple] = {}
+    
+    async def get_active_pack(self) -> Optional[Dict[str, Any]]:
+        return next((pack for pack in reversed(self.packs) if pack.get("active")), None)
+    
+    async def set_active_pack(self, doc: Dict[str, Any]):
+        for pack in self.packs:
+            pack["active"] = False
+        self.packs.append(doc)
+    
+    async def active_pack_key(self) -> Optional[tuple]:
+        for index in range(len(self.packs) - 1, -1, -1):
+            if self.packs[index].get("active"):
+                return index, self.packs[index].get("version")
+        return None
+    
+    async def has_digest(self, digest: str) -> bool:
+        return digest in self.digests
+    
+    async def claim_digest(self, digest: str) -> bool:
+        if digest in self.digests:
+            return False
+        self.digests.add(digest)
+        return True
+    
+    async def release_digest(self, digest: str):
+        self.digests.discard(digest)
+    
+    async def insert_scores(self, docs: List[Dict[str, Any]]):
+        for doc in docs:
+            if doc["replay_digest"] in self.written:
+                continue
+            self.written.add(doc["replay_digest"])
+            keys, rows = self.boards.setdefault(get_board_key(doc["daily"], doc.get("day")), ([], []))
+            index = bisect.bisect_right(keys, -doc["score"])
+            keys.insert(index, -doc["score"])
+            rows.insert(index, {field: doc.get(field) for field in LEADERBOARD_PROJECTION if field != "_id"})
+    
+    async def written_digests(self, digests: List[str]) -> set:
+        return self.written.intersection(digests)
+    
+    async def item_exists(self, item_hash: str) -> bool:
+        return item_hash in self.items
+    
+    async def mint_items(self, docs: List[Dict[str, Any]]):
+        for doc in docs:
+            self.items.setdefault(doc["hash"], doc)
+    
+    async def count_board(self, daily: bool, day: Optional[str] = None, primary: bool = False) -> int:
+        return len(self.board(daily, day)[0])
+    
+    async def count_above(self, daily: bool, day: Optional[str], score: int) -> int:
+        return bisect.bisect_left(self.board(daily, day)[0], -score)
+    
+    async def page(self, daily: bool, day: Optional[str], offset: int, limit: int, primary: bool = False) -> List[Dict[str, Any]]:
+        return self.board(daily, day)[1][offset:offset + limit]
+    
+    def board(self, daily: bool, day: Optional[str]) -> tuple:
+        query = build_board_query(daily, day)
+        return self.boards.get(get_board_key(daily, query.get("day")), ([], []))
+
+class SqliteStorage(Storage):
+    """SQLite in WAL mode: one writer thread, a small pool of reader threads"""
+    name = "sqlite"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content_packs (id INTEGER PRIMARY KEY, active INTEGER NOT NULL, doc TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS replay_digests (digest TEXT PRIMARY KEY, created_at TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS scores (
+            replay_digest TEXT PRIMARY KEY, board TEXT NOT NULL, score INTEGER NOT NULL,
+            username TEXT, depth INTEGER, artifacts TEXT, day TEXT, created_at TEXT, doc TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scores_board_score ON scores (board, score DESC);
+        CREATE TABLE IF NOT EXISTS items (hash TEXT PRIMARY KEY, doc TEXT NOT NULL);
+    """
+    
+    def __init__(self, path: str, readers: int = 4):
+        # Deferred so the default backend never loads sqlite3
+        import sqlite3
+        self.sqlite3 = sqlite3
+        self.errors = (sqlite3.OperationalError,)
+        self.path = path
+        self.local = threading.local()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-reader")
+    
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self.sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    async def read(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.readers, lambda: self.connection().execute(sql, params).fetchall()
+        )
+    
+    async def write(self, func):
+        def run():
+            conn = self.connection()
+            with conn:
+                return func(conn)
+        return await asyncio.get_running_loop().run_in_executor(self.writer, run)
+    
+    async def connect(self):
+        await self.write(lambda conn: conn.executescript(self.SCHEMA))
+    
+    async def close(self):
+        self.writer.shutdown(wait=True)
+        self.readers.shutdown(wait=True)
+    
+    async def get_active_pack(self) -> Optional[Dict[str, Any]]:
+        rows = await self.read("SELECT doc FROM content_packs WHERE active = 1 ORDER BY id DESC LIMIT 1")
+        return json.loads(rows[0][0]) if rows else None
+    
+    async def set_active_pack(self, doc: Dict[str, Any]):
+        body = json.dumps(doc, default=encode_json_value)
+        def update(conn):
+            conn.execute("UPDATE content_packs SET active = 0")
+            conn.execute("INSERT INTO content_packs (active, doc) VALUES (1, ?)", (body,))
+        await self.write(update)
+    
+    async def active_pack_key(self) -> Optional[tuple]:
+        rows = await self.read(
+            "SELECT id, json_extract(doc, '$.version') FROM content_packs WHERE active = 1 ORDER BY id DESC LIMIT 1"
+        )
+        return tuple(rows[0]) if rows else None
+    
+    async def has_digest(self, digest: str) -> bool:
+        return bool(await self.read("SELECT 1 FROM replay_digests WHERE digest = ?", (digest,)))
+    
+    async def claim_digest(self, digest: str) -> bool:
+        created_at = datetime.now(timezone.utc).isoformat()
+        return await self.write(lambda conn: conn.execute(
+            "INSERT OR IGNORE INTO replay_digests VALUES (?, ?)", (digest, created_at)
+        ).rowcount == 1)
+    
+    async def release_digest(self, digest: str):
+        await self.write(lambda conn: conn.execute("DELETE FROM replay_digests WHERE digest = ?", (digest,)))
+    
+    async def insert_scores(self, docs: List[Dict[str, Any]]):
+        rows = [
+            (
+                doc["replay_digest"], get_board_key(doc["daily"], doc.get("day")), doc["score"],
+                doc.get("username"), doc["depth"], json.dumps(doc["artifacts"]), doc.get("day"),
+                doc["created_at"].isoformat(), json.dumps(doc, default=encode_json_value)
+            )
+            for doc in docs
+        ]
+        await self.write(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        ))
+    
+    async def written_digests(self, digests: List[str]) -> set:
+        placeholders = ",".join("?" * len(digests))
+        rows = await self.read(f"SELECT replay_digest FROM scores WHERE replay_digest IN ({placeholders})", tuple(digests))
+        return {row[0] for row in rows}
+    
+    async def item_exists(self, item_hash: str) -> bool:
+        return bool(await self.read("SELECT 1 FROM items WHERE hash = ?", (item_hash,)))
+    
+    async def mint_items(self, docs: List[Dict[str, Any]]):
+        rows = [(doc["hash"], json.dumps(doc, default=encode_json_value)) for doc in docs]
+        await self.write(lambda conn: conn.executemany("INSERT OR IGNORE INTO items VALUES (?, ?)", rows))
+    
+    async def count_board(self, daily: bool, day: Optional[str] = None, primary: bool = False) -> int:
+        rows = await self.read("SELECT COUNT(*) FROM scores WHERE board = ?", (self.board(daily, day),))
+        return rows[0][0]
+    
+    async def count_above(self, daily: bool, day: Optional[str], score: int) -> int:
+        rows = await self.read(
+            "SELECT COUNT(*) FROM scores WHERE board = ? AND score > ?", (self.board(daily, day), score)
+        )
+        return rows[0][0]
+    
+    async def page(self, daily: bool, day: Optional[str], offset: int, limit: int, primary: bool = False) -> List[Dict[str, Any]]:
+        rows = await self.read(
+            "SELECT username, score, depth, artifacts, day, created_at FROM scores "
+            "WHERE board = ? ORDER BY score DESC LIMIT ? OFFSET ?",
+            (self.board(daily, day), limit, offset)
+        )
+        return [
+            {
+                "username": username, "score": score, "depth": depth, "artifacts": json.loads(artifacts),
+                "day": row_day, "created_at": datetime.fromisoformat(created_at)
+            }
+            for username, score, depth, artifacts, row_day, created_at in rows
+        ]
+    
+    def board(self, daily: bool, day: Optional[str]) -> str:
+        return get_board_key(daily, build_board_query(daily, day).get("day"))
+
+class StorageUnavailable(Exception):
+    """Raised instead of waiting on storage while the circuit breaker is open"""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Storage unavailable, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Opens after consecutive failed or slow storage calls and fails fast while open.
+
+    After reset_s one probe call is let through (half-open); a fast success
+    closes the breaker, anything else opens it again. Bulk calls are judged
+    against their own, looser slow-call and timeout limits.
+    """
+    def __init__(
+        self,
+        failure_threshold: int,
+        slow_call_s: float,
+        reset_s: float,
+        call_timeout_s: float,
+        bulk_slow_call_s: float = 15.0,
+        bulk_timeout_s: float = 60.0
+    ):
+        self.failure_threshold = failure_threshold
+        self.slow_call_s = slow_call_s
+        self.reset_s = reset_s
+        self.call_timeout_s = call_timeout_s
+        self.bulk_slow_call_s = bulk_slow_call_s
+        self.bulk_timeout_s = bulk_timeout_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.errors: tuple = ()
+    
+    def is_open(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_s
+    
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.reset_s - (time.monotonic() - self.opened_at)))
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and not self.is_open():
+            self.transition("half_open")
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+    
+    async def call(self, func, *args, bulk: bool = False):
+        if not self.allow():
+            metrics.inc("circuit_breaker_rejections_total")
+            raise StorageUnavailable(self.retry_after())
+        probe = self.state == "half_open"
+        slow_call_s, timeout_s = (self.bulk_slow_call_s, self.bulk_timeout_s) if bulk else (self.slow_call_s, self.call_timeout_s)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(*args), timeout_s)
+        except (asyncio.TimeoutError, *self.errors) as e:
+            self.record_failure()
+            raise StorageUnavailable(self.retry_after()) from e
+        finally:
+            if probe:
+                self.probing = False
+        if time.perf_counter() - started > slow_call_s:
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.transition("open")
+    
+    def record_success(self):
+        self.failures = 0
+        if self.state != "closed":
+            self.transition("closed")
+    
+    def transition(self, state: str):
+        logger.warning("Storage circuit breaker %s -> %s", self.state, state, extra={"event": "circuit_breaker"})
+        metrics.inc("circuit_breaker_transitions_total", state=state)
+        self.state = state
+
+class GuardedStorage(Storage):
+    """Runs every storage operation through a circuit breaker"""
+    def __init__(self, inner: Storage, breaker: CircuitBreaker):
+        self.inner = inner
+        self.breaker = breaker
+        self.breaker.errors = inner.errors
+        self.name = inner.name
+    
+    async def connect(self):
+        await self.inner.connect()
+    
+    async def close(self):
+        await self.inner.close()
+    
+    async def get_active_pack(self) -> Optional[Dict[str, Any]]:
+        return await self.breaker.call(self.inner.get_active_pack)
+    
+    async def set_active_pack(self, doc: Dict[str, Any]):
+        await self.breaker.call(self.inner.set_active_pack, doc)
+    
+    async def active_pack_key(self) -> Optional[tuple]:
+        return await self.breaker.call(self.inner.active_pack_key)
+    
+    async def has_digest(self, digest: str) -> bool:
+        return await self.breaker.call(self.inner.has_digest, digest)
+    
+    async def claim_digest(self, digest: str) -> bool:
+        return await self.breaker.call(self.inner.claim_digest, digest)
+    
+    async def release_digest(self, digest: str):
+        await self.breaker.call(self.inner.release_digest, digest)
+    
+    async def insert_scores(self, docs: List[Dict[str, Any]]):
+        await self.breaker.call(self.inner.insert_scores, docs, bulk=True)
+    
+    async def written_digests(self, digests: List[str]) -> set:
+        return await self.breaker.call(self.inner.written_digests, digests)
+    
+    async def item_exists(self, item_hash: str) -> bool:
+        return await self.breaker.call(self.inner.item_exists, item_hash)
+    
+    async def mint_items(self, docs: List[Dict[str, Any]]):
+        await self.breaker.call(self.inner.mint_items, docs, bulk=True)
+    
+    async def count_board(self, daily: bool, day: Optional[str] = None, primary: bool = False) -> int:
+        return await self.breaker.call(self.inner.count_board, daily, day, primary)
+    
+    async def count_above(self, daily: bool, day: Optional[str], score: int) -> int:
+        return await self.breaker.call(self.inner.count_above, daily, day, score)
+    
+    async def page(self, daily: bool, day: Optional[str], offset: int, limit: int, primary: bool = False) -> List[Dict[str, Any]]:
+        return await self.breaker.call(self.inner.page, daily, day, offset, limit, primary)
+
+def create_storage(backend: str) -> Storage:
+    if backend == "mongo":
+        return MongoStorage(db, read_db)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SqliteStorage(SQLITE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}")
+
+storage_breaker = CircuitBreaker(
+    BREAKER_FAILURE_THRESHOLD, BREAKER_SLOW_CALL_S, BREAKER_RESET_S, BREAKER_CALL_TIMEOUT_S,
+    BREAKER_BULK_SLOW_CALL_S, BREAKER_BULK_TIMEOUT_S
+)
+storage = GuardedStorage(create_storage(STORAGE_BACKEND), storage_breaker)
+
+# Marks responses served from last-known-good data while storage is unavailable
+STALE_HEADERS = {"X-Stale": "true", "Cache-Control": "no-store"}
+
+def storage_unavailable(e: StorageUnavailable) -> HTTPException:
+    return HTTPException(status_code=503, detail="Storage unavailable", headers={"Retry-After": str(e.retry_after)})
+
+def require_mongo(feature: str):
+    """Reject endpoints that still depend on MongoDB-only collections"""
+    if storage.name != "mongo":
+        raise HTTPException(status_code=501, detail=f"{feature} requires mongo storage")
+
+# === LEADERBOARD CACHE ===
+
+class TopBoard:
+    """Materialized top-N rows of one board, kept sorted by score"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.rows: List[Dict[str, Any]] = []
+        self.keys: List[int] = []  # negated scores, ascending
+        self.total = 0
+        self.loaded_at = time.monotonic()
+        self.stale = False  # reload failed; serving the last good load
+    
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at < TOP_BOARD_TTL_S
+    
+    def covers(self, offset: int, limit: int) -> bool:
+        return offset + limit <= self.capacity or len(self.rows) == self.total
+    
+    def page(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        return self.rows[offset:offset + limit]
+    
+    def placement(self, score: int) -> Optional[int]:
+        """Rank of a score if it falls inside the materialized rows"""
+        rank = bisect.bisect_left(self.keys, -score)
+        if rank < len(self.rows) or len(self.rows) == self.total:
+            return rank + 1
+        return None
+    
+    def insert(self, entry: Dict[str, Any]) -> Optional[int]:
+        """Insert a new row; returns its rank if it entered the top N"""
+        self.total += 1
+        if len(self.rows) >= self.capacity and entry["score"] <= self.rows[-1]["score"]:
+            return None
+        index = bisect.bisect_right(self.keys, -entry["score"])
+        self.keys.insert(index, -entry["score"])
+        self.rows.insert(index, entry)
+        if len(self.rows) > self.capacity:
+            self.keys.pop()
+            self.rows.pop()
+        return index + 1
+
+top_boards: Dict[str, TopBoard] = {}
+stale_pages: Dict[tuple, Dict[str, Any]] = {}
+
+def is_active_board(board: str) -> bool:
+    """Only the all-time and today's daily boards are materialized"""
+    return board in ("all", get_board_key(True))
+
+async def get_top_board(daily: bool, day: Optional[str] = None) -> Optional[TopBoard]:
+    """Get (loading if needed) the materialized top-N for an active board"""
+    board = get_board_key(daily, day)
+    if not is_active_board(board):
+        return None
+    
+    top = top_boards.get(board)
+    if top and top.is_fresh():
+        metrics.inc("cache_requests_total", cache="top_board", result="hit")
+        return top
+    metrics.inc("cache_requests_total", cache="top_board", result="miss")
+    
+    # (Re)load from the score index; picks up rows written by other workers.
+    # Placement is computed against this board, so it reads the primary rather
+    # than a secondary that may not have the latest flushes yet
+    stale, top = top, TopBoard(TOP_BOARD_SIZE)
+    try:
+        top.total = await storage.count_board(daily, day, primary=True)
+        rows = await storage.page(daily, day, 0, TOP_BOARD_SIZE, primary=True)
+    except StorageUnavailable:
+        if not stale:
+            raise
+        # Keep serving the last load (plus local inserts) until storage recovers
+        metrics.inc("stale_responses_total", cache="top_board")
+        stale.stale = True
+        return stale
+    for row in rows:
+        top.keys.append(-row["score"])
+        top.rows.append(format_leaderboard_row(row))
+    
+    # Rows accepted but not yet flushed by the score writer
+    for row in await score_writer.pending_rows(board):
+        top.insert(format_leaderboard_row(row))
+    
+    # Drop boards from previous days
+    for key in [key for key in top_boards if not is_active_board(key)]:
+        del top_boards[key]
+    top_boards[board] = top
+    return top
+
+class LeaderboardBroadcaster:
+    """Fans out top-N diffs to live subscribers; slow consumers are dropped"""
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self.subscribers: Dict[str, set] = {}
+    
+    def subscribe(self, board: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        self.subscribers.setdefault(board, set()).add(queue)
+        return queue
+    
+    def unsubscribe(self, board: str, queue: asyncio.Queue):
+        queue_set = self.subscribers.get(board)
+        if queue_set:
+            queue_set.discard(queue)
+            if not queue_set:
+                del self.subscribers[board]
+    
+    def publish(self, board: str, event: str):
+        """Queue one pre-encoded event for every subscriber of a board"""
+        for queue in list(self.subscribers.get(board, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and close its stream
+                self.unsubscribe(board, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+def encode_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {dump_json(data).decode()}\n\n"
+
+broadcaster = LeaderboardBroadcaster(LIVE_FEED_BUFFER)
+
+# === SCORE INGESTION ===
+
+class ScoreQueueFull(Exception):
+    pass
+
+class ScoreWriter:
+    """Write-behind buffer flushing accepted scores with batched inserts"""
+    def __init__(self, max_pending: int, batch_size: int, flush_interval: float):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer: List[Dict[str, Any]] = []
+        self.in_flight: List[Dict[str, Any]] = []
+        self.pending_one_of_ones: set = set()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+    
+    def full(self) -> bool:
+        return len(self.buffer) + len(self.in_flight) >= self.max_pending
+    
+    def submit(self, board: str, score_doc: Dict[str, Any], item_docs: List[Dict[str, Any]]):
+        """Accept a validated score; raises ScoreQueueFull when saturated"""
+        if self.full():
+            raise ScoreQueueFull()
+        self.buffer.append({"board": board, "score": score_doc, "items": item_docs})
+        self.pending_one_of_ones.update(item["hash"] for item in item_docs)
+        if len(self.buffer) >= self.batch_size:
+            self.wakeup.set()
+    
+    async def pending_rows(self, board: str) -> List[Dict[str, Any]]:
+        """Accepted rows of a board that storage doesn't hold yet"""
+        entries = [entry for entry in self.in_flight + self.buffer if entry["board"] == board and not entry.get("written")]
+        # The batch being inserted may already be partly or wholly visible
+        in_flight = [entry["score"]["replay_digest"] for entry in entries if entry in self.in_flight]
+        written = await storage.written_digests(in_flight) if in_flight else set()
+        return [entry["score"] for entry in entries if entry["score"]["replay_digest"] not in written]
+    
+    async def pending_above(self, board: str, score: int) -> int:
+        return sum(1 for row in await self.pending_rows(board) if row["score"] > score)
+    
+    def pending_score(self, digest: str) -> Optional[Dict[str, Any]]:
+        """An accepted row by replay digest, if it is still queued or being written"""
+        for entry in self.in_flight + self.buffer:
+            if entry["score"]["replay_digest"] == digest:
+                return entry["score"]
+        return None
+    
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+    
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                while self.buffer:
+                    with trace_span("score_writer.flush", batch=min(len(self.buffer), self.batch_size)):
+                        await self.flush()
+            except Exception as e:
+                logger.error("Error flushing scores: %s", e)
+                await asyncio.sleep(1)
+    
+    async def flush(self):
+        """Write one batch.
+
+        The batch goes back to the buffer only while storage is unavailable;
+        rows storage rejects outright are dead-lettered instead of retried forever.
+        """
+        batch = self.in_flight = self.buffer[:self.batch_size]
+        self.buffer = self.buffer[self.batch_size:]
+        try:
+            try:
+                await storage.insert_scores([entry["score"] for entry in batch])
+            except StorageUnavailable:
+                raise
+            except Exception:
+                # One bad row fails the whole insert; find it so the rest can land
+                await self.insert_one_by_one(batch)
+            stored = [entry for entry in batch if "rejected" not in entry]
+            # Stored now, even if a later step fails and the batch is retried
+            for entry in stored:
+                entry["written"] = True
+            item_docs = [item for entry in stored for item in entry["items"]]
+            if item_docs:
+                await storage.mint_items(item_docs)
+            best_updates = [
+                player_best_update(entry["board"], entry["score"]["username"], entry["score"]["score"])
+                for entry in stored if entry["score"]["username"]
+            ]
+            if best_updates and storage.name == "mongo":
+                await storage_breaker.call(partial(db.player_bests.bulk_write, best_updates, ordered=False), bulk=True)
+        except StorageUnavailable:
+            self.buffer = [entry for entry in batch if "rejected" not in entry] + self.buffer
+            raise
+        except Exception as e:
+            # Rows are stored but their items or bests can't be; retrying won't help
+            self.dead_letter([entry for entry in batch if "rejected" not in entry], e)
+        except BaseException:
+            self.buffer = [entry for entry in batch if "rejected" not in entry] + self.buffer
+            raise
+        finally:
+            self.in_flight = []
+        self.pending_one_of_ones.difference_update(item["hash"] for entry in batch for item in entry["items"])
+    
+    async def insert_one_by_one(self, batch: List[Dict[str, Any]]):
+        """Insert rows singly, dead-lettering the ones storage rejects"""
+        for entry in batch:
+            try:
+                await storage.insert_scores([entry["score"]])
+                entry["written"] = True
+            except StorageUnavailable:
+                raise
+            except Exception as e:
+                entry["rejected"] = True
+                self.dead_letter([entry], e)
+                # The run was never stored; let it be submitted again
+                try:
+                    await storage.release_digest(entry["score"]["replay_digest"])
+                except Exception as release_error:
+                    logger.error("Error releasing replay digest %s: %s", entry["score"]["replay_digest"], release_error)
+    
+    def dead_letter(self, entries: List[Dict[str, Any]], error: Exception):
+        """Log rows that can't be written and append them to the dead-letter file"""
+        lines = []
+        for entry in entries:
+            metrics.inc("score_dead_letters_total")
+            logger.error(
+                "Dead-lettered score %s: %s", entry["score"]["replay_digest"], str(error)[:200],
+                extra={"event": "score_dead_letter", "board": entry["board"]}
+            )
+            row = {**entry["score"], "items": entry["items"], "error": str(error)[:1000]}
+            lines.append(json.dumps(row, default=encode_export_value, separators=(',', ':')) + "\n")
+        try:
+            with open(SCORE_DEAD_LETTER_FILE, "a") as f:
+                f.writelines(lines)
+        except OSError as e:
+            logger.error("Error writing score dead letters: %s", e)
+    
+    async def close(self):
+        """Stop the flush loop and drain everything accepted so far"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        try:
+            while self.buffer:
+                await self.flush()
+        except Exception as e:
+            logger.error("Error draining score queue, %s scores unwritten: %s", len(self.buffer), e)
+
+async def insert_ignoring_duplicates(collection, docs: List[Dict[str, Any]]):
+    """insert_many that tolerates rows already written by an earlier attempt"""
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+
+score_writer = ScoreWriter(SCORE_QUEUE_MAX, SCORE_BATCH_SIZE, SCORE_FLUSH_INTERVAL_S)
+
+# === STATS SKETCHES ===
+
+class Histogram:
+    """Mergeable log-bucketed histogram (about 5% relative error)"""
+    LOG_GROWTH = math.log(1.1)
+    
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self.counts: Dict[int, int] = counts or {}
+    
+    @classmethod
+    def bucket(cls, value: float) -> int:
+        return int(math.log1p(max(value, 0)) / cls.LOG_GROWTH)
+    
+    @classmethod
+    def bounds(cls, bucket: int) -> tuple:
+        return math.expm1(bucket * cls.LOG_GROWTH), math.expm1((bucket + 1) * cls.LOG_GROWTH)
+    
+    def add(self, value: float):
+        bucket = self.bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+    
+    def merge(self, other: "Histogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+    
+    def quantile(self, q: float) -> float:
+        total = sum(self.counts.values())
+        if total == 0:
+            return 0.0
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                lower, upper = self.bounds(bucket)
+                return round((lower + upper) / 2, 2)
+        return 0.0
+    
+    def summary(self) -> MetricStats:
+        return MetricStats(
+            count=sum(self.counts.values()),
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+            histogram=[
+                [round(lower, 2), round(upper, 2), self.counts[bucket]]
+                for bucket in sorted(self.counts)
+                for lower, upper in [self.bounds(bucket)]
+            ]
+        )
+
+STAT_METRICS = ("score", "depth", "artifacts")
+
+# Per-board deltas not yet persisted; all workers $inc into one doc per board
+stats_pending: Dict[str, Dict[str, Histogram]] = {}
+
+def record_run_stats(board: str, score: int, depth: int, artifacts: int):
+    """Add an accepted run to the board's sketches"""
+    sketches = stats_pending.setdefault(board, {metric: Histogram() for metric in STAT_METRICS})
+    sketches["score"].add(score)
+    sketches["depth"].add(depth)
+    sketches["artifacts"].add(artifacts)
+
+async def flush_stats():
+    """Merge local sketch deltas into the shared per-board documents"""
+    global stats_pending
+    pending, stats_pending = stats_pending, {}
+    boards = list(pending.items())
+    for index, (board, sketches) in enumerate(boards):
+        increments = {
+            f"{metric}.{bucket}": count
+            for metric, histogram in sketches.items()
+            for bucket, count in histogram.counts.items()
+        }
+        try:
+            await db.stats_sketches.update_one(
+                {"_id": board},
+                {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception:
+            # Keep this board's deltas and those of every board not written yet for the next flush
+            for unwritten, unwritten_sketches in boards[index:]:
+                merged = stats_pending.setdefault(unwritten, {name: Histogram() for name in STAT_METRICS})
+                for metric, histogram in unwritten_sketches.items():
+                    merged[metric].merge(histogram)
+            raise
+
+async def stats_flush_loop():
+    """Periodically persist sketch deltas"""
+    while True:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL_S)
+        try:
+            await flush_stats()
+        except Exception as e:
+            logger.error("Error flushing stats: %s", e)
+
+# Last shared sketch document read per board, served while storage is unavailable
+stats_docs: Dict[str, Dict[str, Any]] = {}
+
+async def get_board_stats(board: str) -> tuple:
+    """Shared sketches for a board merged with this worker's unflushed deltas.
+
+    Returns (sketches, stale); stale when the shared part is a last-known copy.
+    """
+    doc = {}
+    stale = False
+    if storage.name == "mongo":
+        # Other backends keep sketches in this process only
+        try:
+            doc = stats_docs[board] = await storage_breaker.call(read_db.stats_sketches.find_one, {"_id": board}) or {}
+        except StorageUnavailable:
+            if board not in stats_docs:
+                raise
+            metrics.inc("stale_responses_total", cache="stats")
+            doc, stale = stats_docs[board], True
+    sketches = {
+        metric: Histogram({int(bucket): count for bucket, count in doc.get(metric, {}).items()})
+        for metric in STAT_METRICS
+    }
+    for metric, histogram in stats_pending.get(board, {}).items():
+        sketches[metric].merge(histogram)
+    return sketches, stale
+
+# === DAILY ARCHIVES ===
+
+archived_days: Dict[str, Dict[str, Any]] = {}
+
+def parse_board_day(day: Optional[str]) -> Optional[str]:
+    """Validate a `day` query parameter; returns it as YYYY-MM-DD"""
+    if day is None:
+        return None
+    try:
+        parsed = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid day")
+    if parsed > datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Day is in the future")
+    return parsed.strftime('%Y-%m-%d')
+
+def is_closed_day(day: str) -> bool:
+    """A daily board is closed once its day (plus a grace period) has ended"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ARCHIVE_GRACE_S)
+    return day < cutoff.strftime('%Y-%m-%d')
+
+def in_retention_window(day: str) -> bool:
+    """Raw rows of older days have expired; a snapshot of them would be truncated"""
+    oldest = datetime.now(timezone.utc) - timedelta(days=SCORE_RETENTION_DAYS)
+    return day >= oldest.strftime('%Y-%m-%d')
+
+def archive_etag(rows_gz: bytes, total: int) -> str:
+    return hashlib.sha256(rows_gz + str(total).encode()).hexdigest()[:32]
+
+async def freeze_daily_board(day: str) -> Dict[str, Any]:
+    """Snapshot a closed daily board into a single compressed document"""
+    query = build_board_query(True, day)
+    total = await storage_breaker.call(db.scores.count_documents, query, bulk=True)
+    cursor = db.scores.find(query).sort("score", -1).limit(ARCHIVE_MAX_ROWS)
+    raw_rows = await storage_breaker.call(partial(cursor.to_list, length=ARCHIVE_MAX_ROWS), bulk=True)
+    rows = [format_leaderboard_row(row) for row in raw_rows]
+    rows_gz = gzip.compress(dump_json(rows))
+    
+    archive = {
+        "day": day,
+        "total": total,
+        "rows_gz": rows_gz,
+        "etag": archive_etag(rows_gz, total),
+        "created_at": datetime.now(timezone.utc)
+    }
+    try:
+        await storage_breaker.call(db.daily_archives.insert_one, archive)
+    except DuplicateKeyError:
+        # Another worker froze it first
+        return await storage_breaker.call(db.daily_archives.find_one, {"day": day})
+    
+    # Raw rows are no longer read; only the day's top survives retention
+    keep_ids = [row["_id"] for row in raw_rows[:SCORE_KEEP_TOP]]
+    await storage_breaker.call(db.scores.update_many, {"_id": {"$in": keep_ids}}, {"$unset": {"expire_at": ""}}, bulk=True)
+    logger.info("Archived daily board %s (%s scores)", day, total)
+    return archive
+
+async def get_daily_archive(day: str) -> Dict[str, Any]:
+    """Get the decoded snapshot of a closed daily board"""
+    snapshot = archived_days.get(day)
+    if snapshot and time.monotonic() - snapshot["loaded_at"] < ARCHIVE_MAX_AGE_S:
+        metrics.inc("cache_requests_total", cache="daily_archive", result="hit")
+        return snapshot
+    
+    if snapshot:
+        # Imports can merge into an archive on any worker; recheck the etag only
+        current = await storage_breaker.call(db.daily_archives.find_one, {"day": day}, {"etag": 1})
+        if current and current["etag"] == snapshot["etag"]:
+            metrics.inc("cache_requests_total", cache="daily_archive", result="hit")
+            snapshot["loaded_at"] = time.monotonic()
+            return snapshot
+    metrics.inc("cache_requests_total", cache="daily_archive", result="miss")
+    
+    archive = await storage_breaker.call(db.daily_archives.find_one, {"day": day})
+    if not archive:
+        if not in_retention_window(day):
+            # Nothing to freeze; answer without persisting (or caching) anything
+            return {"rows": [], "total": 0, "etag": "empty"}
+        archive = await freeze_daily_board(day)
+    
+    snapshot = {
+        "rows": json.loads(gzip.decompress(archive["rows_gz"])),
+        "total": archive["total"],
+        "etag": archive["etag"],
+        "loaded_at": time.monotonic()
+    }
+    archived_days.pop(day, None)
+    if len(archived_days) >= 32:
+        archived_days.pop(next(iter(archived_days)))
+    archived_days[day] = snapshot
+    return snapshot
+
+async def archive_closed_days():
+    """Freeze closed days inside the retention window before their rows expire"""
+    today = datetime.now(timezone.utc)
+    for days_ago in range(1, SCORE_RETENTION_DAYS + 1):
+        day = (today - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+        if not is_closed_day(day):
+            continue
+        if await db.daily_archives.find_one({"day": day}, {"_id": 1}):
+            continue
+        await freeze_daily_board(day)
+
+async def retention_loop():
+    """Periodically archive closed daily boards"""
+    while True:
+        try:
+            await archive_closed_days()
+        except Exception as e:
+            logger.error("Error archiving daily boards: %s", e)
+        await asyncio.sleep(3600)
+
+# === DAILY ROLLOVER ===
+
+current_daily: Optional[Dict[str, Any]] = None
+
+def prepare_daily(now: datetime) -> Dict[str, Any]:
+    """Precompute a day's seed, /daily response and empty top board"""
+    start, end = get_daily_timeframe(now)
+    return {
+        "day": start.strftime('%Y-%m-%d'),
+        "response": DailyResponse(
+            seed=generate_daily_seed(start),
+            start=start.isoformat(),
+            end=end.isoformat()
+        ),
+        "board": TopBoard(TOP_BOARD_SIZE)
+    }
+
+async def sleep_until(when: datetime):
+    """Sleep until a wall-clock instant, re-checking against clock drift"""
+    while (remaining := (when - datetime.now(timezone.utc)).total_seconds()) > 0:
+        await asyncio.sleep(min(remaining, 60))
+
+async def daily_rollover_loop():
+    """Prepare the next daily ahead of UTC midnight and swap it in on time"""
+    global current_daily
+    current_daily = prepare_daily(datetime.now(timezone.utc))
+    while True:
+        try:
+            _, end = get_daily_timeframe()
+            await sleep_until(end - timedelta(seconds=DAILY_PREWARM_S))
+            next_daily = prepare_daily(end)
+            
+            # Warm the query plan for the new board's index range
+            await storage.page(True, next_daily["day"], 0, 1)
+            
+            await sleep_until(end)
+            yesterday = current_daily["day"]
+            current_daily = next_daily
+            next_daily["board"].loaded_at = time.monotonic()
+            top_boards[get_board_key(True, next_daily["day"])] = next_daily["board"]
+            for key in [key for key in top_boards if not is_active_board(key)]:
+                del top_boards[key]
+            logger.info("Daily rolled over to %s", next_daily['day'])
+            
+            # Freeze yesterday's board before clients start asking for it
+            if storage.name == "mongo":
+                await sleep_until(end + timedelta(seconds=ARCHIVE_GRACE_S))
+                await get_daily_archive(yesterday)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error during daily rollover: %s", e)
+            await asyncio.sleep(5)
+
+background_tasks: List[asyncio.Task] = []
+
+# === BULK IMPORT ===
+
+import_pool = None
+
+def get_import_pool():
+    """Process pool for import validation, created on first use"""
+    global import_pool
+    if import_pool is None:
+        # Deferred: multiprocessing is only needed once an admin import runs
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        import_pool = ProcessPoolExecutor(
+            max_workers=IMPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return import_pool
+
+def verify_imported_replay(row: Dict[str, Any], doc: Dict[str, Any], content_pack: ContentPack):
+    """Re-simulate an imported score from its replay log"""
+    if "replayLog" not in row:
+        raise ValueError("Missing replayLog")
+    replay_log = ReplayLog(**row["replayLog"])
+    if calculate_replay_digest(replay_log) != doc["replay_digest"]:
+        raise ValueError("Replay digest mismatch")
+    if doc["version"] != content_pack.version:
+        raise ValueError("Content version mismatch")
+    result = GameSimulator(content_pack, doc["seed"]).simulate_run(replay_log)
+    if result["depth"] != doc["depth"] or [item.hash for item in result["items"]] != doc["artifacts"]:
+        raise ValueError("Replay validation failed")
+
+def validate_import_chunk(
+    collection: str,
+    lines: List[tuple],
+    content_pack: Optional[ContentPack],
+    trace_parent: Optional[Dict[str, Any]] = None
+) -> tuple:
+    """Parse and validate NDJSON rows (runs in the import process pool)"""
+    # Spans can't be exported from the child; they are returned to the caller
+    span = start_span("import.validate_chunk", trace_parent, rows=len(lines)) if trace_parent else None
+    valid, errors = [], []
+    for line_no, line in lines:
+        try:
+            row = json.loads(line)
+            if collection == "scores":
+                doc = Score(**row).dict()
+                if content_pack is not None:
+                    verify_imported_replay(row, doc, content_pack)
+            else:
+                doc = Item(**row).dict()
+            # Keep exported ids so re-running an import is idempotent
+            if ObjectId.is_valid(row.get("_id", "")):
+                doc["_id"] = ObjectId(row["_id"])
+            valid.append(doc)
+        except Exception as e:
+            errors.append({"line": line_no, "error": str(e)[:200]})
+    if span:
+        span["attributes"]["errors"] = len(errors)
+        end_span(span)
+    return valid, errors, [span] if span else []
+
+async def iter_import_batches(request: Request, batch_size: int):
+    """Yield (line_no, line) batches from an NDJSON body, gzip or plain"""
+    decompressor = None
+    buffer = b""
+    line_no = 0
+    batch = []
+    
+    def take_lines(lines):
+        nonlocal line_no
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                batch.append((line_no, line.decode()))
+    
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        if decompressor is None:
+            decompressor = zlib.decompressobj(wbits=31) if chunk[:2] == b"\x1f\x8b" else False
+        buffer += decompressor.decompress(chunk) if decompressor else chunk
+        *lines, buffer = buffer.split(b"\n")
+        take_lines(lines)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    
+    if decompressor:
+        buffer += decompressor.flush()
+    take_lines(buffer.split(b"\n"))
+    if batch:
+        yield batch
+
+async def write_import_batch(collection: str, docs: List[Dict[str, Any]], days: Dict[str, Dict[str, Any]]) -> tuple:
+    """Insert validated rows unordered; returns (accepted, duplicates)
+
+    Accepted daily rows are collected per day in `days` (count plus the top
+    ARCHIVE_MAX_ROWS) for merging into frozen archives afterwards.
+    """
+    if not docs:
+        return 0, 0
+    duplicates = set()
+    
+    if collection == "scores":
+        # Claim digests first so already-known runs are skipped
+        now = datetime.now(timezone.utc)
+        try:
+            await db.replay_digests.insert_many(
+                [{"_id": doc["replay_digest"], "created_at": now} for doc in docs],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            duplicates = {error["index"] for error in e.details["writeErrors"]}
+        docs = [doc for index, doc in enumerate(docs) if index not in duplicates]
+        if not docs:
+            return 0, len(duplicates)
+        
+        claimed = [doc["replay_digest"] for doc in docs]
+        try:
+            await insert_ignoring_duplicates(db.scores, docs)
+        except Exception:
+            # Release claims for rows that didn't land so a rerun imports them
+            written = set(await db.scores.distinct("replay_digest", {"replay_digest": {"$in": claimed}}))
+            await db.replay_digests.delete_many({"_id": {"$in": [digest for digest in claimed if digest not in written]}})
+            raise
+        best_updates = []
+        for doc in docs:
+            board = get_board_key(doc["daily"], doc["day"])
+            record_run_stats(board, doc["score"], doc["depth"], len(doc["artifacts"]))
+            if doc["username"]:
+                best_updates.append(player_best_update(board, doc["username"], doc["score"]))
+            if doc["day"]:
+                imported = days.setdefault(doc["day"], {"count": 0, "rows": []})
+                imported["count"] += 1
+                imported["rows"].append(doc)
+                if len(imported["rows"]) >= 2 * ARCHIVE_MAX_ROWS:
+                    imported["rows"] = heapq.nlargest(ARCHIVE_MAX_ROWS, imported["rows"], key=lambda row: row["score"])
+        if best_updates:
+            await storage_breaker.call(partial(db.player_bests.bulk_write, best_updates, ordered=False), bulk=True)
+        return len(docs), len(duplicates)
+    
+    # Items are keyed by hash (the index isn't unique), so an item that already
+    # exists is matched rather than minted twice; exported rows keep their _id
+    result = await db.items.bulk_write(
+        [UpdateOne({"hash": doc["hash"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs],
+        ordered=False
+    )
+    accepted = result.upserted_count
+    return accepted, len(docs) - accepted
+
+async def merge_into_archive(day: str, rows: List[Dict[str, Any]], added: int):
+    """Add imported rows to a frozen daily board instead of refreezing it.
+
+    Refreezing reads the raw rows, and past retention only the day's top
+    SCORE_KEEP_TOP survive, so the archive would come back truncated.
+    """
+    archive = await db.daily_archives.find_one({"day": day})
+    if not archive:
+        # Not frozen yet; the first read freezes it from the raw rows
+        return
+    merged = json.loads(gzip.decompress(archive["rows_gz"])) + [format_leaderboard_row(row) for row in rows]
+    rows_gz = gzip.compress(dump_json(heapq.nlargest(ARCHIVE_MAX_ROWS, merged, key=lambda row: row["score"])))
+    total = archive["total"] + added
+    await db.daily_archives.update_one(
+        {"_id": archive["_id"]},
+        {"$set": {"total": total, "rows_gz": rows_gz, "etag": archive_etag(rows_gz, total)}}
+    )
+    archived_days.pop(day, None)
+
+# === API ENDPOINTS ===
+
+@api_router.get("/health", response_model=HealthResponse)
+async def health():
+    """Health check endpoint"""
+    return HealthResponse()
+
+@api_router.get("/ready", response_model=HealthResponse)
+async def ready():
+    """Readiness probe: the server only accepts connections once startup warmup has finished"""
+    return HealthResponse()
+
+@api_router.get("/content")
+async def get_content():
+    """Get active content pack"""
+    try:
+        await get_active_content_pack()
+        headers = STALE_HEADERS if content_cache["stale"] else None
+        return Response(content_cache["body"], media_type="application/json", headers=headers)
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
+    except Exception as e:
+        logger.error("Error fetching content pack: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to fetch content pack")
+
+@api_router.post("/admin/content")
+async def admin_update_content(
+    content_pack: ContentPack,
+    x_api_key: str = Header(...)
+):
+    """Admin endpoint to update content pack"""
+    verify_admin_key(x_api_key)
+    
+    try:
+        # Replace the active pack
+        content_pack.active = True
+        content_pack.created_at = datetime.now(timezone.utc)
+        await storage.set_active_pack(content_pack.dict())
+        cache_content_pack(content_pack)
+        
+        logger.info("Content pack updated to version %s", content_pack.version)
+        return {"status": "success", "version": content_pack.version}
+    
+    except Exception as e:
+        logger.error("Error updating content pack: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update content pack")
+
+@api_router.get("/admin/export")
+async def admin_export(
+    collection: str = "scores",
+    day: Optional[str] = None,
+    version: Optional[str] = None,
+    since: Optional[str] = None,
+    x_api_key: str = Header(...)
+):
+    """Stream scores or items as gzip-compressed NDJSON in _id order"""
+    verify_admin_key(x_api_key)
+    require_mongo("Export")
+    if collection not in ("scores", "items"):
+        raise HTTPException(status_code=400, detail="collection must be scores or items")
+    
+    query: Dict[str, Any] = {}
+    if day:
+        if collection == "scores":
+            query["day"] = day
+        else:
+            try:
+                start = datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid day")
+            query["minted_at"] = {"$gte": start, "$lt": start + timedelta(days=1)}
+    if version:
+        if collection != "scores":
+            raise HTTPException(status_code=400, detail="version filter only applies to scores")
+        query["version"] = version
+    if since:
+        # Resume token: the _id of the last row already received
+        try:
+            query["_id"] = {"$gt": ObjectId(since)}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid since token")
+    
+    async def rows():
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        cursor = db[collection].find(query).sort("_id", 1).batch_size(500)
+        lines = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            lines.append(json.dumps(doc, default=encode_export_value, separators=(',', ':')))
+            if len(lines) >= 500:
+                chunk = compressor.compress(("\n".join(lines) + "\n").encode())
+                lines = []
+                if chunk:
+                    # Awaiting the send here is the backpressure on slow clients
+                    yield chunk
+        if lines:
+            yield compressor.compress(("\n".join(lines) + "\n").encode())
+        yield compressor.flush()
+    
+    # A gzip file rather than gzip-encoded NDJSON: clients that decode
+    # Content-Encoding would otherwise save plain text under a .gz name
+    return StreamingResponse(
+        rows(),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{collection}.ndjson.gz"'}
+    )
+
+@api_router.post("/admin/import")
+async def admin_import(
+    request: Request,
+    collection: str = "scores",
+    resimulate: bool = False,
+    x_api_key: str = Header(...)
+):
+    """Bulk import NDJSON (optionally gzip) scores or items"""
+    global import_pool
+    verify_admin_key(x_api_key)
+    require_mongo("Import")
+    if collection not in ("scores", "items"):
+        raise HTTPException(status_code=400, detail="collection must be scores or items")
+    
+    content_pack = await get_active_content_pack() if resimulate and collection == "scores" else None
+    loop = asyncio.get_running_loop()
+    pool = get_import_pool()
+    started = time.monotonic()
+    summary = {"rows": 0, "accepted": 0, "duplicates": 0, "errors": 0}
+    error_samples: List[Dict[str, Any]] = []
+    days: Dict[str, Dict[str, Any]] = {}
+    validating: List[asyncio.Future] = []
+    
+    async def write_next():
+        valid, errors, spans = await validating.pop(0)
+        for span in spans:
+            span_exporter.export(span)
+        accepted, duplicates = await write_import_batch(collection, valid, days)
+        summary["rows"] += len(valid) + len(errors)
+        summary["accepted"] += accepted
+        summary["duplicates"] += duplicates
+        summary["errors"] += len(errors)
+        error_samples.extend(errors[:100 - len(error_samples)])
+        if summary["rows"] % (IMPORT_BATCH_SIZE * 50) < IMPORT_BATCH_SIZE:
+            logger.info("Import progress: %s", summary)
+    
+    try:
+        # Validate batches in parallel while earlier batches are written
+        async for batch in iter_import_batches(request, IMPORT_BATCH_SIZE):
+            parent = current_span.get()
+            trace_parent = {"traceId": parent["traceId"], "spanId": parent["spanId"]} if parent else None
+            validating.append(loop.run_in_executor(pool, validate_import_chunk, collection, batch, content_pack, trace_parent))
+            if len(validating) > IMPORT_WORKERS * 2:
+                await write_next()
+        while validating:
+            await write_next()
+    except Exception as e:
+        from concurrent.futures.process import BrokenProcessPool
+        if isinstance(e, BrokenProcessPool):
+            import_pool = None
+        logger.error("Error importing %s: %s after %s", collection, e, summary)
+        raise HTTPException(status_code=500, detail=f"Import failed after {summary['rows']} rows")
+    finally:
+        # Rows written so far (a rerun skips them) invalidate cached boards and extend frozen snapshots
+        top_boards.clear()
+        for day, imported in days.items():
+            try:
+                await merge_into_archive(day, imported["rows"], imported["count"])
+            except Exception as e:
+                logger.error("Error updating archive %s after import: %s", day, e)
+    
+    elapsed = time.monotonic() - started
+    logger.info("Imported %s: %s in %.1fs", collection, summary, elapsed)
+    return {
+        **summary,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(summary["rows"] / elapsed) if elapsed > 0 else 0,
+        "error_samples": error_samples
+    }
+
+@api_router.get("/admin/profiles")
+async def admin_list_profiles(x_api_key: str = Header(...)):
+    """List profiles in the ring buffer"""
+    verify_admin_key(x_api_key)
+    return [
+        {
+            "id": profile["id"],
+            "route": profile["route"],
+            "started_at": profile["started_at"],
+            "duration_ms": profile["duration_ms"],
+            "samples": sum(profile["samples"].values())
+        }
+        for profile in list(profiler.profiles)
+    ]
+
+@api_router.get("/admin/profiles/folded")
+async def admin_download_profiles(id: Optional[int] = None, x_api_key: str = Header(...)):
+    """Download profiles as folded stacks (flamegraph.pl / speedscope compatible)"""
+    verify_admin_key(x_api_key)
+    return Response(
+        profiler.folded(id),
+        media_type="text/plain",
+        headers={"Content-Disposition": 'attachment; filename="profiles.folded"'}
+    )
+
+@api_router.get("/daily", response_model=DailyResponse)
+async def get_daily():
+    """Get daily seed and timeframe"""
+    try:
+        # Precomputed by the rollover scheduler
+        if current_daily and current_daily["day"] == datetime.now(timezone.utc).strftime('%Y-%m-%d'):
+            return current_daily["response"]
+        
+        seed = generate_daily_seed()
+        start, end = get_daily_timeframe()
+        
+        return DailyResponse(
+            seed=seed,
+            start=start.isoformat(),
+            end=end.isoformat()
+        )
+    except Exception as e:
+        logger.error("Error generating daily seed: %s", e)
         raise HTTPException(status_code=500, detail="Failed to generate daily seed")
 
 @api_router.get("/leaderboard", response_model=LeaderboardResponse)
@@ -700,86 +3071,270 @@ async def get_leaderboard(
     limit: int = 50,
     offset: int = 0,
     daily: bool = False,
-    day: Optional[str] = None
+    day: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Get leaderboard with pagination"""
+    day = parse_board_day(day)
     try:
-        # Build query
-        query = {}
-        if daily:
-            if day:
-                query["day"] = day
-            else:
-                today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-                query["day"] = today
-            query["daily"] = True
-        else:
-            query["daily"] = False
+        # Closed daily boards are frozen snapshots; imports can still merge
+        # into them, so clients revalidate by ETag once max-age runs out
+        if daily and day and is_closed_day(day) and offset + limit <= ARCHIVE_MAX_ROWS and storage.name == "mongo":
+            snapshot = await get_daily_archive(day)
+            etag = f'"{snapshot["etag"]}-{offset}-{limit}"'
+            headers = {"ETag": etag, "Cache-Control": f"public, max-age={ARCHIVE_MAX_AGE_S}"}
+            if if_none_match == etag:
+                return Response(status_code=304, headers=headers)
+            return json_response(
+                {"rows": snapshot["rows"][offset:offset + limit], "total": snapshot["total"]},
+                headers=headers
+            )
         
-        # Get total count
-        total = await db.scores.count_documents(query)
+        # Serve top pages of active boards from the materialized top-N
+        top = await get_top_board(daily, day)
+        if top and top.covers(offset, limit):
+            headers = STALE_HEADERS if top.stale else None
+            return json_response({"rows": top.page(offset, limit), "total": top.total}, headers=headers)
         
-        # Get paginated results
-        cursor = db.scores.find(query).sort("score", -1).skip(offset).limit(limit)
-        scores = await cursor.to_list(length=limit)
+        page_key = (daily, day, offset, limit)
+        try:
+            # Get total count
+            total = await storage.count_board(daily, day)
+            
+            # Get paginated results
+            scores = await storage.page(daily, day, offset, limit)
+        except StorageUnavailable:
+            if page_key not in stale_pages:
+                raise
+            metrics.inc("stale_responses_total", cache="leaderboard_page")
+            return json_response(stale_pages[page_key], headers=STALE_HEADERS)
         
         # Format response
-        rows = [
-            LeaderboardEntry(
-                username=score.get("username", "Anonymous"),
-                score=score["score"],
-                depth=score["depth"],
-                artifacts=len(score["artifacts"]),
-                day=score.get("day"),
-                created_at=score["created_at"]
-            )
-            for score in scores
-        ]
+        rows = [format_leaderboard_row(score) for score in scores]
+        
+        # Last-known-good copy for degraded mode
+        stale_pages.pop(page_key, None)
+        stale_pages[page_key] = {"rows": rows, "total": total}
+        while len(stale_pages) > STALE_PAGE_CACHE_SIZE:
+            del stale_pages[next(iter(stale_pages))]
         
-        return LeaderboardResponse(rows=rows, total=total)
+        return json_response({"rows": rows, "total": total})
     
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
     except Exception as e:
-        logger.error(f"Error fetching leaderboard: {e}")
+        logger.error("Error fetching leaderboard: %s", e)
         raise HTTPException(status_code=500, detail="Failed to fetch leaderboard")
 
+@api_router.get("/leaderboard/around", response_model=LeaderboardWindowResponse)
+async def get_leaderboard_around(
+    score: Optional[int] = None,
+    digest: Optional[str] = None,
+    k: int = 5,
+    daily: bool = False,
+    day: Optional[str] = None
+):
+    """Get the K rows above and below a score or submitted run"""
+    require_mongo("Leaderboard windows")
+    day = parse_board_day(day)
+    try:
+        k = max(1, min(k, 25))
+        query = build_board_query(daily, day)
+        exclude = {}
+        
+        if digest:
+            # Anchor on the submitted run and its own board. It was likely just
+            # submitted: look in the write-behind queue, then on the primary
+            anchor = score_writer.pending_score(digest)
+            if not anchor:
+                anchor = await storage_breaker.call(db.scores.find_one, {"replay_digest": digest})
+            if not anchor:
+                raise HTTPException(status_code=404, detail="Score not found")
+            score = anchor["score"]
+            query = build_board_query(anchor["daily"], anchor.get("day"))
+            exclude = {"replay_digest": {"$ne": digest}}
+        elif score is None:
+            raise HTTPException(status_code=400, detail="Provide score or digest")
+        
+        # Two bounded index range scans outward from the anchor score
+        above_cursor = read_db.scores.find({**query, "score": {"$gt": score}}).sort("score", 1).limit(k)
+        above = await storage_breaker.call(partial(above_cursor.to_list, length=k))
+        below_cursor = read_db.scores.find({**query, **exclude, "score": {"$lte": score}}).sort("score", -1).limit(k)
+        below = await storage_breaker.call(partial(below_cursor.to_list, length=k))
+        
+        return LeaderboardWindowResponse(
+            score=score,
+            above=[format_leaderboard_row(row) for row in reversed(above)],
+            below=[format_leaderboard_row(row) for row in below]
+        )
+    
+    except HTTPException:
+        raise
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
+    except Exception as e:
+        logger.error("Error fetching leaderboard window: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to fetch leaderboard window")
+
+@api_router.get("/leaderboard/stream")
+async def stream_leaderboard(daily: bool = False):
+    """Server-Sent Events feed of top-N changes on an active board"""
+    top = await get_top_board(daily)
+    board = get_board_key(daily)
+    queue = broadcaster.subscribe(board)
+    
+    async def events():
+        nonlocal top, board, queue
+        try:
+            yield encode_sse("snapshot", {
+                "rows": top.page(0, LIVE_FEED_TOP_N),
+                "total": top.total
+            })
+            while True:
+                timeout = 15
+                if daily:
+                    # Wake at UTC midnight so the feed follows the new daily board
+                    now = datetime.now(timezone.utc)
+                    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+                    timeout = min(timeout, (midnight - now).total_seconds() + 0.05)
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    event = ": ping\n\n"
+                if event is None:
+                    break
+                if daily and get_board_key(True) != board:
+                    # Rolled over: move to today's board and send its snapshot instead
+                    try:
+                        top = await get_top_board(True)
+                    except StorageUnavailable:
+                        break  # The client reconnects once storage is back
+                    broadcaster.unsubscribe(board, queue)
+                    board = get_board_key(True)
+                    queue = broadcaster.subscribe(board)
+                    yield encode_sse("snapshot", {
+                        "rows": top.page(0, LIVE_FEED_TOP_N),
+                        "total": top.total
+                    })
+                    continue
+                yield event
+        finally:
+            broadcaster.unsubscribe(board, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/stats", response_model=StatsResponse)
+async def get_stats(response: Response, daily: bool = False):
+    """Get score, depth and artifact distributions for a board"""
+    try:
+        board = get_board_key(daily)
+        sketches, stale = await get_board_stats(board)
+        if stale:
+            response.headers.update(STALE_HEADERS)
+        return StatsResponse(
+            board=board,
+            metrics={metric: histogram.summary() for metric, histogram in sketches.items()}
+        )
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
+    except Exception as e:
+        logger.error("Error fetching stats: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to fetch stats")
+
+@api_router.get("/leaderboard/me", response_model=PlayerBestResponse)
+async def get_my_best(
+    username: str,
+    daily: bool = False,
+    day: Optional[str] = None
+):
+    """Get a player's best score and rank on a board"""
+    require_mongo("Player bests")
+    day = parse_board_day(day)
+    try:
+        board = get_board_key(daily, day)
+        best = await storage_breaker.call(read_db.player_bests.find_one, {"board": board, "username": username})
+        if not best:
+            raise HTTPException(status_code=404, detail="No score for player on this board")
+        
+        # Rank among players, served from the (board, score) index
+        rank = await storage_breaker.call(read_db.player_bests.count_documents, {
+            "board": board,
+            "score": {"$gt": best["score"]}
+        }) + 1
+        
+        return PlayerBestResponse(
+            username=username,
+            score=best["score"],
+            rank=rank,
+            day=board.split(":", 1)[1] if daily else None
+        )
+    
+    except HTTPException:
+        raise
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
+    except Exception as e:
+        logger.error("Error fetching player best: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to fetch player best")
+
 @api_router.post("/score/submit", response_model=ScoreResponse)
-@limiter.limit("10/minute")
 async def submit_score(request: Request, submission: ScoreSubmission):
     """Submit and validate score"""
     try:
+        if score_writer.full():
+            metrics.inc("score_queue_rejections_total")
+            raise HTTPException(status_code=503, detail="Score queue full", headers={"Retry-After": "2"})
+        if storage_breaker.is_open():
+            # Duplicate checks need the primary; don't validate runs we can't accept
+            metrics.inc("circuit_breaker_rejections_total")
+            raise storage_unavailable(StorageUnavailable(storage_breaker.retry_after()))
+        
         # Get active content pack
-        content_pack = await get_active_content_pack()
+        with submit_stage("content_fetch"):
+            content_pack = await get_active_content_pack()
         
         # Validate content version
+        if submission.version != content_pack.version:
+            # The pack may have changed since this worker last checked
+            content_pack = await get_active_content_pack(revalidate=True)
         if submission.version != content_pack.version:
             raise HTTPException(status_code=400, detail="Content version mismatch")
         
         # Calculate replay digest
-        replay_digest = calculate_replay_digest(submission.replayLog)
-        
-        # Check for duplicate submission
-        existing = await db.scores.find_one({"replay_digest": replay_digest})
-        if existing:
-            raise HTTPException(status_code=400, detail="Score already submitted")
-        
-        # Validate OneOfOne uniqueness -> 1/1 uniqueness
-        for item in submission.items:
-            if item.rarity == "1/1":
-                existing_item = await db.items.find_one({"hash": item.hash})
-                if existing_item:
-                    raise HTTPException(status_code=400, detail=f"1/1 item {item.hash} already exists")
+        with submit_stage("digest"):
+            replay_digest = calculate_replay_digest(submission.replayLog)
         
-        # Re-simulate run for validation
-        simulator = GameSimulator(content_pack, submission.seed)
-        simulation_result = simulator.simulate_run(submission.replayLog)
-        
-        # Validate client-submitted items match simulation
-        if len(submission.items) != len(simulation_result["items"]):
-            raise HTTPException(status_code=400, detail="Item count mismatch")
+        with submit_stage("duplicate_check"):
+            # Check for duplicate submission (registry outlives expired daily rows)
+            if await storage.has_digest(replay_digest):
+                raise HTTPException(status_code=400, detail="Score already submitted")
+            
+            # Validate OneOfOne uniqueness -> 1/1 uniqueness
+            for item in submission.items:
+                if item.rarity == "1/1":
+                    existing_item = (
+                        item.hash in score_writer.pending_one_of_ones
+                        or await storage.item_exists(item.hash)
+                    )
+                    if existing_item:
+                        raise HTTPException(status_code=400, detail=f"1/1 item {item.hash} already exists")
         
-        for client_item, sim_item in zip(submission.items, simulation_result["items"]):
-            if client_item.hash != sim_item.hash or client_item.rarity != sim_item.rarity:
-                raise HTTPException(status_code=400, detail="Item validation failed")
+        with submit_stage("simulation"):
+            # Re-simulate run for validation
+            simulator = GameSimulator(content_pack, submission.seed)
+            simulation_result = simulator.simulate_run(submission.replayLog)
+            
+            # Validate client-submitted items match simulation
+            if len(submission.items) != len(simulation_result["items"]):
+                raise HTTPException(status_code=400, detail="Item count mismatch")
+            
+            for client_item, sim_item in zip(submission.items, simulation_result["items"]):
+                if client_item.hash != sim_item.hash or client_item.rarity != sim_item.rarity:
+                    raise HTTPException(status_code=400, detail="Item validation failed")
         
         # Use server-calculated score for validation, but prefer client score if provided
         server_score = simulation_result["score"]
@@ -787,9 +3342,6 @@ async def submit_score(request: Request, submission: ScoreSubmission):
         validated_depth = simulation_result["depth"]
         validated_artifacts = simulation_result["artifacts"]
         
-        # Log score details for debugging
-        logging.info(f"Score submitted: client={submission.score}, server={server_score}, final={validated_score} at depth {validated_depth}")
-        
         # Create score record
         day = None
         if submission.daily:
@@ -805,36 +3357,72 @@ async def submit_score(request: Request, submission: ScoreSubmission):
             depth=validated_depth,
             duration_s=0,  # Client could provide this
             artifacts=[item.hash for item in submission.items],
-            replay_digest=replay_digest
+            replay_digest=replay_digest,
+            expire_at=get_score_expiry(day) if day else None
         )
-        
-        # Insert score
-        await db.scores.insert_one(score_record.dict())
+        score_doc = score_record.dict()
         
         # Register 1/1 items
-        for item in simulation_result["items"]:
-            if item.rarity == "1/1":
-                item_record = Item(
-                    hash=item.hash,
-                    name=item.name,
-                    rarity=item.rarity,
-                    set=item.set,
-                    effects=item.effects,
-                    lore=item.lore
-                )
-                await db.items.insert_one(item_record.dict())
-        
-        # Calculate placement
-        query = {"daily": submission.daily}
-        if submission.daily and day:
-            query["day"] = day
+        item_docs = [
+            Item(
+                hash=item.hash,
+                name=item.name,
+                rarity=item.rarity,
+                set=item.set,
+                effects=item.effects,
+                lore=item.lore
+            ).dict()
+            for item in simulation_result["items"]
+            if item.rarity == "1/1"
+        ]
         
-        placement = await db.scores.count_documents({
-            **query,
-            "score": {"$gt": validated_score}
-        }) + 1
+        with submit_stage("insert"):
+            # Load the board first: a reload that fails must not leave the digest claimed
+            board = get_board_key(submission.daily, day)
+            top = await get_top_board(submission.daily, day)
+            
+            # Claim the digest atomically so concurrent duplicates can't both land
+            if not await storage.claim_digest(replay_digest):
+                raise HTTPException(status_code=400, detail="Score already submitted")
+            
+            # Queue score for batched insert; placement comes from in-memory state
+            try:
+                score_writer.submit(board, score_doc, item_docs)
+            except ScoreQueueFull:
+                metrics.inc("score_queue_rejections_total")
+                # Nothing was queued; free the digest so the run can be resubmitted
+                try:
+                    await storage.release_digest(replay_digest)
+                except Exception as e:
+                    logger.error("Error releasing replay digest %s: %s", replay_digest, e)
+                raise HTTPException(status_code=503, detail="Score queue full", headers={"Retry-After": "2"})
         
-        logger.info(f"Score submitted: {validated_score} at depth {validated_depth}")
+        record_run_stats(board, validated_score, validated_depth, validated_artifacts)
+        
+        with submit_stage("placement"):
+            placement = None
+            if top:
+                row = format_leaderboard_row(score_doc)
+                rank = top.insert(row)
+                placement = top.placement(validated_score)
+                if rank and rank <= LIVE_FEED_TOP_N:
+                    broadcaster.publish(board, encode_sse("insert", {"rank": rank, "row": row}))
+            
+            if placement is None:
+                placement = await storage.count_above(submission.daily, day, validated_score) \
+                    + await score_writer.pending_above(board, validated_score) + 1
+        
+        logger.info(
+            "Score submitted: %s at depth %s", validated_score, validated_depth,
+            extra={
+                "event": "score_submitted",
+                "client_score": submission.score,
+                "server_score": server_score,
+                "depth": validated_depth,
+                "placement": placement,
+                "daily": submission.daily
+            }
+        )
         
         return ScoreResponse(
             score=validated_score,
@@ -845,8 +3433,10 @@ async def submit_score(request: Request, submission: ScoreSubmission):
     
     except HTTPException:
         raise
+    except StorageUnavailable as e:
+        raise storage_unavailable(e)
     except Exception as e:
-        logger.error(f"Error submitting score: {e}")
+        logger.error("Error submitting score: %s", e, extra={"event": "score_submit_error"})
         raise HTTPException(status_code=500, detail="Failed to submit score")
 
 @api_router.get("/seed/play")
@@ -866,22 +3456,221 @@ async def get_custom_seed(seedStr: str):
         }
     
     except Exception as e:
-        logger.error(f"Error processing custom seed: {e}")
+        logger.error("Error processing custom seed: %s", e)
         raise HTTPException(status_code=400, detail="Invalid seed string")
 
 # Include router
 app.include_router(api_router)
 
+@app.get("/metrics")
+async def get_metrics(x_api_key: str = Header(...)):
+    """Prometheus metrics (admin only; scrape with the X-API-Key header)"""
+    verify_admin_key(x_api_key)
+    mongo_metrics_listener.drain()
+    return Response(
+        metrics.render()
+        + f"score_queue_pending {len(score_writer.buffer) + len(score_writer.in_flight)}\n"
+        + f"storage_circuit_open {int(storage_breaker.state != 'closed')}\n"
+        + f"admission_in_flight {admission.in_flight}\n"
+        + f"admission_queued {len(admission.waiters)}\n"
+        + "".join(f"process_{key} {value}\n" for key, value in process_memory().items()),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception: {exc}")
+    logger.error("Global exception: %s", exc)
     return {"error": "Internal server error"}
 
+async def warm_up():
+    """Load what the first requests need so a fresh worker doesn't serve them cold"""
+    started = time.perf_counter()
+    content_pack = await get_active_content_pack()
+    
+    # One pass through the validation path: pydantic validators, simulator, digest
+    replay = ReplayLog(
+        seed="0",
+        contentVersion=content_pack.version,
+        rooms=[{"depth": depth, "type": "normal", "choice": "continue"} for depth in range(1, 21)],
+        choices=[],
+        rolls=0,
+        items=[]
+    )
+    GameSimulator(content_pack, replay.seed).simulate_run(replay)
+    calculate_replay_digest(replay)
+    
+    await get_top_board(False)
+    await get_top_board(True)
+    elapsed = time.perf_counter() - started
+    metrics.observe("startup_warmup_seconds", elapsed)
+    logger.info("Warmup finished in %.0f ms", elapsed * 1000)
+
+@app.on_event("startup")
+async def startup_db_client():
+    span_exporter.start()
+    await storage.connect()
+    if storage.name == "mongo":
+        await ensure_indexes()
+        await backfill_replay_digests()
+        background_tasks.append(asyncio.create_task(retention_loop()))
+        background_tasks.append(asyncio.create_task(stats_flush_loop()))
+    await warm_up()
+    background_tasks.append(asyncio.create_task(daily_rollover_loop()))
+    score_writer.start()
+    if forked_at is not None:
+        elapsed = time.monotonic() - forked_at
+        metrics.observe("worker_fork_to_ready_seconds", elapsed)
+        logger.info(
+            "Worker %d ready %.0f ms after fork", os.getpid(), elapsed * 1000,
+            extra={"event": "worker_ready", "fork_to_ready_ms": round(elapsed * 1000, 1), **process_memory()}
+        )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await score_writer.close()
+    if import_pool:
+        import_pool.shutdown(wait=False, cancel_futures=True)
+    if storage.name == "mongo":
+        try:
+            await flush_stats()
+        except Exception as e:
+            logger.error("Error flushing stats: %s", e)
+    await storage.close()
+    span_exporter.close()
     client.close()
+    read_client.close()
+    log_listener.stop()
 
-if __name__ == "__main__":
+# === PRE-FORK WORKERS ===
+
+# Set in pre-forked workers to the master's clock reading just before fork()
+forked_at: Optional[float] = None
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, int]:
+    """Resident, proportional (Pss), shared and private bytes from /proc; empty off Linux"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0]) * 1024
+    except OSError:
+        return {}
+    return {
+        "resident_memory_bytes": fields.get("Rss", 0),
+        "proportional_memory_bytes": fields.get("Pss", 0),
+        "shared_memory_bytes": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_memory_bytes": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+async def preload_content_pack():
+    """Load the active pack in the master over a connection that is closed before forking"""
+    preload_client = None
+    if STORAGE_BACKEND == "mongo":
+        preload_client = AsyncIOMotorClient(mongo_url)
+        source = MongoStorage(preload_client[db.name])
+    else:
+        source = create_storage(STORAGE_BACKEND)
+    try:
+        await source.connect()
+        cache_content_pack(await load_active_content_pack(source))
+    finally:
+        await source.close()
+        if preload_client:
+            preload_client.close()
+
+def run_worker(sock: socket.socket, started: float):
+    """Child side of fork(): serve on the inherited socket, never return"""
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    global forked_at, log_listener
+    forked_at = started
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    # The master's log listener thread did not survive the fork, and may have held the metrics lock
+    metrics.lock = threading.Lock()
+    log_listener = configure_logging()
+    gc.enable()
+    code = 0
+    try:
+        uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT)).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+        code = 1
+    finally:
+        os._exit(code)
+
+def serve_prefork(workers: int):
+    """Load the content pack once, freeze it with everything imported so far, then fork.
+
+    Workers start with the pack, its loot tables and the /content body already
+    built and share those pages with the master until written. Frozen objects
+    are skipped by the cyclic GC, so collections in a worker don't touch (and
+    un-share) them.
+    """
+    if STORAGE_BACKEND == "memory":
+        logger.warning("memory storage is per process; %d workers will each keep their own scores", workers)
+    # No automatic collections between loading and freezing
+    gc.disable()
+    asyncio.run(preload_content_pack())
+    gc.collect()
+    gc.freeze()
+    
+    # asyncio only sets TCP_NODELAY on connections from sockets that say IPPROTO_TCP
+    sock = socket.socket(socket.AF_INET6 if ":" in HOST else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    
+    children: Dict[int, float] = {}
+    stopping = False
+    
+    def spawn():
+        started = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            run_worker(sock, started)
+        children[pid] = started
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    logger.info("Pre-fork master %d serving %s:%d with %d workers", os.getpid(), HOST, PORT, workers)
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        logger.warning("Worker %d exited with status %d; restarting", pid, os.waitstatus_to_exitcode(status))
+        # Don't spin when workers die during startup (e.g. storage is down)
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        if not stopping:
+            spawn()
+    sock.close()
+    log_listener.stop()
+
+if __name__ == "__main__":
+    if WORKERS > 1:
+        serve_prefork(WORKERS)
+    else:
+        import uvicorn
+        uvicorn.run(app, host=HOST, port=PORT)
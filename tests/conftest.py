@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+# Unit tests run against the in-process store and a private rate-limit table
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("RATE_LIMIT_PATH", os.path.join(tempfile.mkdtemp(), "ratelimit"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest  # noqa: E402
+
+import server  # noqa: E402
+from tests.helpers import Api  # noqa: E402
+
+
+def use_storage(monkeypatch, store):
+    """Point the app at a fresh store, breaker, writer and empty caches"""
+    breaker = server.CircuitBreaker(5, 1.0, 10.0, 5.0)
+    monkeypatch.setattr(server, "storage_breaker", breaker)
+    monkeypatch.setattr(server, "storage", server.GuardedStorage(store, breaker))
+    monkeypatch.setattr(server, "score_writer", server.ScoreWriter(100, 10, 0.25))
+    monkeypatch.setattr(server, "admission", server.AdmissionController(64, 256, 1.0))
+    for name in ("content_cache", "top_boards", "stale_pages", "stats_pending", "stats_docs", "archived_days"):
+        monkeypatch.setattr(server, name, {})
+    monkeypatch.setattr(server.limiter, "enabled", False)
+
+
+@pytest.fixture
+def api():
+    client = Api()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def memory_app(monkeypatch, api):
+    use_storage(monkeypatch, server.MemoryStorage())
+    return api
+
+
+@pytest.fixture
+def mongo_app(monkeypatch, api):
+    """The app on the Mongo backend, backed by an in-process mongomock database"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    database = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "read_db", database)
+    use_storage(monkeypatch, server.MongoStorage(database))
+    api.run(server.ensure_indexes())
+    api.db = database
+    return api
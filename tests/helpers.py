@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+
+import server
+
+ADMIN_HEADERS = {"X-API-Key": server.ADMIN_API_KEY}
+
+
+class Api:
+    """Requests against the ASGI app on one event loop, without a socket or lifespan"""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+    
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+    
+    def request(self, method, path, **kwargs) -> httpx.Response:
+        async def send():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await client.request(method, path, **kwargs)
+        return self.run(send())
+    
+    def get(self, path, **kwargs) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+    
+    def post(self, path, **kwargs) -> httpx.Response:
+        return self.request("POST", path, **kwargs)
+    
+    def pack(self) -> server.ContentPack:
+        return self.run(server.get_active_content_pack())
+    
+    def submit(self, seed, username="player", daily=False, rooms=20) -> httpx.Response:
+        return self.post("/api/score/submit", json=make_submission(self.pack(), seed, username, daily, rooms))
+    
+    def flush(self):
+        """Write everything the score writer has accepted"""
+        while server.score_writer.buffer:
+            self.run(server.score_writer.flush())
+    
+    def close(self):
+        self.loop.close()
+
+
+def make_submission(pack, seed, username="player", daily=False, rooms=20):
+    """A replay the server's own simulation accepts"""
+    replay = server.ReplayLog(
+        seed=seed,
+        contentVersion=pack.version,
+        rooms=[{"depth": depth, "type": "normal", "choice": "continue"} for depth in range(1, rooms + 1)],
+        choices=[],
+        rolls=0,
+        items=[]
+    )
+    result = server.GameSimulator(pack, seed).simulate_run(replay)
+    return {
+        "username": username,
+        "seed": seed,
+        "version": pack.version,
+        "daily": daily,
+        "replayLog": replay.dict(),
+        "items": [item.dict() for item in result["items"]]
+    }
@@ -0,0 +1,71 @@
+import asyncio
+
+from server import AdmissionController
+
+
+def test_admits_up_to_the_limit_then_sheds_when_queue_is_full():
+    async def scenario():
+        admission = AdmissionController(limit=2, queue_limit=0, queue_timeout_s=1)
+        assert await admission.acquire(1)
+        assert await admission.acquire(1)
+        assert not await admission.acquire(1)
+        assert admission.in_flight == 2
+        admission.release()
+        assert admission.in_flight == 1
+    
+    asyncio.run(scenario())
+
+
+def test_released_slot_goes_to_highest_priority_waiter():
+    async def scenario():
+        admission = AdmissionController(limit=1, queue_limit=10, queue_timeout_s=5)
+        assert await admission.acquire(1)
+        order = []
+        
+        async def wait(priority, name):
+            assert await admission.acquire(priority)
+            order.append(name)
+        
+        low = asyncio.create_task(wait(2, "low"))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(wait(0, "high"))
+        await asyncio.sleep(0)
+        assert len(admission.waiters) == 2
+        
+        admission.release()
+        await asyncio.sleep(0.01)
+        assert order == ["high"]
+        admission.release()
+        await asyncio.gather(low, high)
+        assert order == ["high", "low"]
+        # The slot was handed over each time, never freed
+        assert admission.in_flight == 1
+    
+    asyncio.run(scenario())
+
+
+def test_waiter_is_shed_after_queue_timeout():
+    async def scenario():
+        admission = AdmissionController(limit=1, queue_limit=10, queue_timeout_s=0.01)
+        assert await admission.acquire(1)
+        assert not await admission.acquire(1)
+        # The timed-out waiter is skipped and the slot is freed
+        admission.release()
+        assert admission.in_flight == 0
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_skipped_on_release():
+    async def scenario():
+        admission = AdmissionController(limit=1, queue_limit=10, queue_timeout_s=5)
+        assert await admission.acquire(1)
+        waiter = asyncio.create_task(admission.acquire(1))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        # The disconnected waiter doesn't swallow the slot
+        admission.release()
+        assert admission.in_flight == 0
+    
+    asyncio.run(scenario())
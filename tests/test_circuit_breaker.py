@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+from server import CircuitBreaker, StorageUnavailable
+
+
+def make_breaker(**overrides):
+    options = dict(failure_threshold=2, slow_call_s=1.0, reset_s=10.0, call_timeout_s=1.0)
+    options.update(overrides)
+    breaker = CircuitBreaker(**options)
+    breaker.errors = (ConnectionError,)
+    return breaker
+
+
+async def ok():
+    return "ok"
+
+
+async def down():
+    raise ConnectionError("down")
+
+
+def call(breaker, func):
+    return asyncio.run(breaker.call(func))
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker()
+    for _ in range(2):
+        with pytest.raises(StorageUnavailable):
+            call(breaker, down)
+    assert breaker.state == "open"
+    
+    calls = []
+    
+    async def tracked():
+        calls.append(1)
+    
+    with pytest.raises(StorageUnavailable) as error:
+        call(breaker, tracked)
+    assert calls == []
+    assert 1 <= error.value.retry_after <= 10
+
+
+def test_success_resets_the_failure_count():
+    breaker = make_breaker()
+    with pytest.raises(StorageUnavailable):
+        call(breaker, down)
+    assert call(breaker, ok) == "ok"
+    with pytest.raises(StorageUnavailable):
+        call(breaker, down)
+    assert breaker.state == "closed"
+
+
+def test_other_errors_pass_through_without_tripping():
+    breaker = make_breaker(failure_threshold=1)
+    
+    async def bug():
+        raise ValueError("bad query")
+    
+    with pytest.raises(ValueError):
+        call(breaker, bug)
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = make_breaker(failure_threshold=1, reset_s=0.01)
+    with pytest.raises(StorageUnavailable):
+        call(breaker, down)
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.probing = False
+    assert call(breaker, ok) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker(failure_threshold=1, reset_s=0.01)
+    with pytest.raises(StorageUnavailable):
+        call(breaker, down)
+    time.sleep(0.02)
+    with pytest.raises(StorageUnavailable):
+        call(breaker, down)
+    assert breaker.state == "open"
+    assert breaker.is_open()
+
+
+def test_slow_and_timed_out_calls_count_as_failures():
+    breaker = make_breaker(failure_threshold=1, slow_call_s=0.0)
+    assert call(breaker, ok) == "ok"
+    assert breaker.state == "open"
+    
+    breaker = make_breaker(failure_threshold=1, call_timeout_s=0.01)
+    
+    async def hang():
+        await asyncio.sleep(1)
+    
+    with pytest.raises(StorageUnavailable):
+        call(breaker, hang)
+    assert breaker.state == "open"
+
+
+def test_bulk_calls_have_their_own_limits():
+    breaker = make_breaker(failure_threshold=1, slow_call_s=0.0, call_timeout_s=0.01, bulk_timeout_s=1.0)
+    
+    async def batch():
+        await asyncio.sleep(0.05)
+        return "written"
+    
+    assert asyncio.run(breaker.call(batch, bulk=True)) == "written"
+    assert breaker.state == "closed"
+    
+    breaker = make_breaker(failure_threshold=1, bulk_timeout_s=0.01)
+    with pytest.raises(StorageUnavailable):
+        asyncio.run(breaker.call(batch, bulk=True))
+    assert breaker.state == "open"
+
+
+def test_cors_exposes_degraded_mode_headers(memory_app):
+    response = memory_app.get("/api/health", headers={"Origin": "http://localhost:3000"})
+    exposed = {name.strip().lower() for name in response.headers["access-control-expose-headers"].split(",")}
+    assert {"x-stale", "retry-after"} <= exposed
@@ -0,0 +1,39 @@
+import pytest
+
+import server
+from tests.helpers import make_submission
+
+
+def activate_elsewhere(api, version):
+    """Replace the active pack the way another worker's /admin/content does"""
+    pack = server.ContentPack(**{**api.pack().dict(), "version": version, "active": True})
+    api.run(server.storage.set_active_pack(pack.dict()))
+    return pack
+
+
+@pytest.mark.parametrize("backend", ["memory_app", "mongo_app"])
+def test_submission_for_a_newer_pack_revalidates(backend, request):
+    api = request.getfixturevalue(backend)
+    cached = api.pack()
+    pack = activate_elsewhere(api, "9.9.9")
+    assert api.pack() is cached  # Still within the TTL
+    
+    response = api.post("/api/score/submit", json=make_submission(pack, "a1"))
+    assert response.status_code == 200
+    assert server.content_cache["pack"].version == "9.9.9"
+    
+    # A version no pack has is still rejected
+    stale = make_submission(cached, "b2")
+    assert api.post("/api/score/submit", json=stale).json()["detail"] == "Content version mismatch"
+
+
+def test_unchanged_pack_is_kept_after_the_ttl(memory_app, monkeypatch):
+    cached = memory_app.pack()
+    body = server.content_cache["body"]
+    monkeypatch.setattr(server, "CONTENT_CACHE_TTL_S", 0)
+    
+    assert memory_app.pack() is cached
+    assert server.content_cache["body"] is body
+    
+    activate_elsewhere(memory_app, "9.9.9")
+    assert memory_app.get("/api/content").json()["version"] == "9.9.9"
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+def days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def add_rows(app, day, scores):
+    app.run(app.db.scores.insert_many([
+        {
+            "daily": True, "day": day, "score": score, "depth": 3, "artifacts": [], "username": f"p{score}",
+            "replay_digest": f"{day}-{score}", "created_at": datetime(2024, 1, 1),
+            "expire_at": server.get_score_expiry(day)
+        }
+        for score in scores
+    ]))
+
+
+def test_closed_day_is_frozen_once_and_revalidated_by_etag(mongo_app):
+    day = days_ago(2)
+    add_rows(mongo_app, day, [10, 30, 20])
+    params = {"daily": "true", "day": day, "limit": 2}
+    
+    response = mongo_app.get("/api/leaderboard", params=params)
+    assert response.status_code == 200
+    assert [row["score"] for row in response.json()["rows"]] == [30, 20]
+    assert response.json()["total"] == 3
+    etag = response.headers["etag"]
+    assert mongo_app.run(mongo_app.db.daily_archives.count_documents({"day": day})) == 1
+    
+    # Later rows don't change a frozen board
+    add_rows(mongo_app, day, [50])
+    server.archived_days.clear()
+    again = mongo_app.get("/api/leaderboard", params=params)
+    assert again.json()["total"] == 3
+    assert again.headers["etag"] == etag
+    
+    assert mongo_app.get("/api/leaderboard", params=params, headers={"If-None-Match": etag}).status_code == 304
+    # Every page has its own tag
+    assert mongo_app.get("/api/leaderboard", params={**params, "offset": 2}).headers["etag"] != etag
+
+
+def test_freezing_keeps_only_the_days_top_from_retention(mongo_app, monkeypatch):
+    monkeypatch.setattr(server, "SCORE_KEEP_TOP", 1)
+    day = days_ago(2)
+    add_rows(mongo_app, day, [10, 30])
+    mongo_app.get("/api/leaderboard", params={"daily": "true", "day": day})
+    kept = mongo_app.run(mongo_app.db.scores.find({"day": day, "expire_at": {"$exists": False}}).to_list(None))
+    assert [row["score"] for row in kept] == [30]
+
+
+def test_day_outside_retention_is_not_persisted(mongo_app):
+    for day in ("1900-01-01", days_ago(server.SCORE_RETENTION_DAYS + 2)):
+        response = mongo_app.get("/api/leaderboard", params={"daily": "true", "day": day})
+        assert response.status_code == 200
+        assert response.json() == {"rows": [], "total": 0}
+    assert mongo_app.run(mongo_app.db.daily_archives.count_documents({})) == 0
+
+
+def test_invalid_days(mongo_app):
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).strftime('%Y-%m-%d')
+    for day in ("junk", "2024-13-01", tomorrow):
+        assert mongo_app.get("/api/leaderboard", params={"daily": "true", "day": day}).status_code == 400
+
+
+def test_cached_archive_is_revalidated_after_max_age(mongo_app, monkeypatch):
+    day = days_ago(2)
+    add_rows(mongo_app, day, [10, 20])
+    params = {"daily": "true", "day": day}
+    first = mongo_app.get("/api/leaderboard", params=params)
+    assert first.headers["cache-control"] == f"public, max-age={server.ARCHIVE_MAX_AGE_S}"
+    
+    # Another worker merges an import; this one still holds the old snapshot
+    cached = server.archived_days[day]
+    mongo_app.run(server.merge_into_archive(day, [{
+        "username": "late", "score": 99, "depth": 3, "artifacts": [], "created_at": datetime(2024, 1, 1)
+    }], 1))
+    server.archived_days[day] = cached
+    assert mongo_app.get("/api/leaderboard", params=params).json()["total"] == 2
+    
+    cached["loaded_at"] -= server.ARCHIVE_MAX_AGE_S
+    second = mongo_app.get("/api/leaderboard", params=params)
+    assert second.json()["total"] == 3
+    assert second.json()["rows"][0]["username"] == "late"
+    assert second.headers["etag"] != first.headers["etag"]
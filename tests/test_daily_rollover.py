@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from server import TopBoard
+
+
+class Clock:
+    """Stands in for server.datetime so now() can be moved by the test"""
+    def __init__(self, now):
+        self.now = now
+        clock = self
+        
+        class FakeDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now
+        
+        self.datetime = FakeDatetime
+
+
+def test_prepare_daily_matches_the_day_it_covers():
+    prepared = server.prepare_daily(datetime(2026, 3, 1, 23, 59, tzinfo=timezone.utc))
+    assert prepared["day"] == "2026-03-01"
+    assert prepared["response"].seed == server.generate_daily_seed(datetime(2026, 3, 1, tzinfo=timezone.utc))
+    assert prepared["response"].start == "2026-03-01T00:00:00+00:00"
+    assert prepared["response"].end == "2026-03-02T00:00:00+00:00"
+    assert prepared["board"].total == 0
+
+
+def test_rollover_swaps_in_the_prepared_day(memory_app, monkeypatch):
+    clock = Clock(datetime(2026, 3, 1, 12, tzinfo=timezone.utc))
+    monkeypatch.setattr(server, "datetime", clock.datetime)
+    monkeypatch.setattr(server, "current_daily", None)
+    server.top_boards["daily:2026-02-28"] = TopBoard(10)
+    
+    waits = []
+    
+    async def sleep_until(when):
+        waits.append(when)
+        if len(waits) > 2:
+            raise asyncio.CancelledError
+        clock.now = when
+    
+    monkeypatch.setattr(server, "sleep_until", sleep_until)
+    with pytest.raises(asyncio.CancelledError):
+        memory_app.run(server.daily_rollover_loop())
+    
+    midnight = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    assert waits[:2] == [midnight - timedelta(seconds=server.DAILY_PREWARM_S), midnight]
+    assert server.current_daily["day"] == "2026-03-02"
+    assert server.current_daily["response"].seed == server.generate_daily_seed(midnight)
+    assert server.top_boards["daily:2026-03-02"] is server.current_daily["board"]
+    assert "daily:2026-02-28" not in server.top_boards
+    
+    # The swapped-in day is served as is
+    assert memory_app.get("/api/daily").json() == server.current_daily["response"].dict()
+
+
+def test_daily_recomputes_when_the_scheduler_lags(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "current_daily", server.prepare_daily(datetime(2000, 1, 1, tzinfo=timezone.utc)))
+    body = memory_app.get("/api/daily").json()
+    assert body["seed"] == server.generate_daily_seed()
+    assert body["start"].startswith(datetime.now(timezone.utc).strftime('%Y-%m-%d'))
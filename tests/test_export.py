@@ -0,0 +1,48 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from tests.helpers import ADMIN_HEADERS
+
+
+def export(api, **params):
+    response = api.get("/api/admin/export", params=params, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+    return [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+
+
+def test_export_scores_in_id_order(mongo_app):
+    for seed in ("a1", "b2", "c3"):
+        assert mongo_app.submit(seed).status_code == 200
+    mongo_app.flush()
+    
+    rows = export(mongo_app)
+    assert [row["seed"] for row in rows] == ["a1", "b2", "c3"]
+    assert [row["_id"] for row in rows] == sorted(row["_id"] for row in rows)
+    
+    # Resume after the first row
+    assert [row["seed"] for row in export(mongo_app, since=rows[0]["_id"])] == ["b2", "c3"]
+
+
+def test_export_filters(mongo_app):
+    assert mongo_app.submit("a1").status_code == 200
+    assert mongo_app.submit("b2", daily=True).status_code == 200
+    mongo_app.flush()
+    
+    daily = export(mongo_app, day=datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+    assert [row["seed"] for row in daily] == ["b2"]
+    assert export(mongo_app, version="0.0.0-missing") == []
+
+
+def test_export_rejects_bad_requests(mongo_app):
+    get = lambda **params: mongo_app.get("/api/admin/export", params=params, headers=ADMIN_HEADERS).status_code
+    assert get(collection="users") == 400
+    assert get(since="not-an-id") == 400
+    assert get(collection="items", version="1") == 400
+    assert mongo_app.get("/api/admin/export").status_code == 422
+
+
+def test_export_needs_mongo(memory_app):
+    assert memory_app.get("/api/admin/export", headers=ADMIN_HEADERS).status_code == 501
@@ -0,0 +1,46 @@
+import pytest
+
+from server import Histogram
+
+
+def test_quantiles_within_relative_error():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.add(value)
+    assert histogram.quantile(0.5) == pytest.approx(500, rel=0.06)
+    assert histogram.quantile(0.9) == pytest.approx(900, rel=0.06)
+    assert histogram.quantile(0.99) == pytest.approx(990, rel=0.06)
+
+
+def test_empty_histogram():
+    assert Histogram().quantile(0.5) == 0.0
+    assert Histogram().summary().count == 0
+
+
+def test_merge_matches_adding_everything():
+    left, right, both = Histogram(), Histogram(), Histogram()
+    for value in range(0, 500):
+        left.add(value)
+        both.add(value)
+    for value in range(500, 2000, 3):
+        right.add(value)
+        both.add(value)
+    left.merge(right)
+    assert left.counts == both.counts
+
+
+def test_negative_values_land_in_the_first_bucket():
+    histogram = Histogram()
+    histogram.add(-5)
+    assert histogram.counts == {0: 1}
+
+
+def test_summary_buckets_bound_their_values():
+    histogram = Histogram()
+    for value in (3, 30, 300):
+        histogram.add(value)
+    summary = histogram.summary()
+    assert summary.count == 3
+    assert [count for _, _, count in summary.histogram] == [1, 1, 1]
+    for (lower, upper, _), value in zip(summary.histogram, (3, 30, 300)):
+        assert lower <= value <= upper
@@ -0,0 +1,85 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+from tests.helpers import ADMIN_HEADERS, make_submission
+
+
+@pytest.fixture
+def importer(mongo_app, monkeypatch):
+    """Validate in threads; the process pool only changes where chunks run"""
+    pool = ThreadPoolExecutor(2)
+    monkeypatch.setattr(server, "get_import_pool", lambda: pool)
+    yield mongo_app
+    pool.shutdown()
+
+
+def post_import(api, body, **params):
+    response = api.post("/api/admin/import", params=params, content=body, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    return response.json()
+
+
+def item_row(hash, **fields):
+    return json.dumps({"hash": hash, "name": "Idol", "rarity": "1/1", "effects": [], "lore": "", **fields})
+
+
+def test_export_round_trip_is_idempotent(importer):
+    for seed in ("a1", "b2", "c3"):
+        assert importer.submit(seed).status_code == 200
+    importer.flush()
+    exported = importer.get("/api/admin/export", headers=ADMIN_HEADERS).content
+    importer.run(importer.db.scores.delete_many({}))
+    importer.run(importer.db.replay_digests.delete_many({}))
+    
+    summary = post_import(importer, exported)
+    assert (summary["rows"], summary["accepted"], summary["duplicates"], summary["errors"]) == (3, 3, 0, 0)
+    assert importer.run(importer.db.scores.count_documents({})) == 3
+    
+    again = post_import(importer, exported)
+    assert (again["accepted"], again["duplicates"]) == (0, 3)
+    assert importer.run(importer.db.scores.count_documents({})) == 3
+
+
+def test_resimulate_rejects_tampered_rows(importer):
+    pack = importer.pack()
+    rows = []
+    for seed, depth_bonus in (("a1", 0), ("b2", 5)):
+        submission = make_submission(pack, seed)
+        replay = server.ReplayLog(**submission["replayLog"])
+        result = server.GameSimulator(pack, seed).simulate_run(replay)
+        rows.append(json.dumps({
+            "seed": seed, "version": pack.version, "daily": False, "score": result["score"],
+            "depth": result["depth"] + depth_bonus, "artifacts": [item.hash for item in result["items"]],
+            "replay_digest": server.calculate_replay_digest(replay), "replayLog": submission["replayLog"]
+        }))
+    
+    summary = post_import(importer, "\n".join(rows).encode(), resimulate="true")
+    assert (summary["accepted"], summary["errors"]) == (1, 1)
+    assert summary["error_samples"] == [{"line": 2, "error": "Replay validation failed"}]
+
+
+def test_bad_rows_are_reported_not_written(importer):
+    rows = [json.dumps({"seed": "a1"}), "{not json"]
+    summary = post_import(importer, "\n".join(rows).encode())
+    assert (summary["accepted"], summary["errors"]) == (0, 2)
+    assert [sample["line"] for sample in summary["error_samples"]] == [1, 2]
+
+
+def test_items_are_matched_by_hash(importer):
+    first = "\n".join([item_row("h1", _id="65f000000000000000000001"), item_row("h2")])
+    assert post_import(importer, gzip.compress(first.encode()), collection="items")["accepted"] == 2
+    
+    # Same hashes under another _id (or none) match the stored items
+    second = "\n".join([item_row("h1", _id="65f000000000000000000002"), item_row("h2"), item_row("h3")])
+    summary = post_import(importer, second.encode(), collection="items")
+    assert (summary["accepted"], summary["duplicates"]) == (1, 2)
+    for hash in ("h1", "h2", "h3"):
+        assert importer.run(importer.db.items.count_documents({"hash": hash})) == 1
+
+
+def test_import_needs_mongo(memory_app):
+    assert memory_app.post("/api/admin/import", content=b"", headers=ADMIN_HEADERS).status_code == 501
@@ -0,0 +1,66 @@
+import server
+from tests.helpers import make_submission
+
+
+def submit_many(app, count, daily=False):
+    pack = app.pack()
+    submissions = []
+    for i in range(count):
+        submission = make_submission(pack, format(0x1000 + i * 7919, "x"), f"p{i}", daily)
+        response = app.post("/api/score/submit", json=submission)
+        assert response.status_code == 200
+        submissions.append((submission, response.json()["score"]))
+    app.flush()
+    return submissions
+
+
+def test_window_around_a_score(mongo_app):
+    scores = sorted((score for _, score in submit_many(mongo_app, 12)), reverse=True)
+    anchor = scores[6]
+    body = mongo_app.get("/api/leaderboard/around", params={"score": anchor, "k": 3}).json()
+    assert body["score"] == anchor
+    assert [row["score"] for row in body["above"]] == [s for s in scores if s > anchor][-3:]
+    assert [row["score"] for row in body["below"]] == [s for s in scores if s <= anchor][:3]
+
+
+def test_window_around_a_submitted_run_excludes_it(mongo_app):
+    submissions = submit_many(mongo_app, 8)
+    submission, score = submissions[3]
+    digest = server.calculate_replay_digest(server.ReplayLog(**submission["replayLog"]))
+    body = mongo_app.get("/api/leaderboard/around", params={"digest": digest, "k": 25}).json()
+    assert body["score"] == score
+    assert len(body["above"]) + len(body["below"]) == 7
+    assert all(row["score"] > score for row in body["above"])
+    assert all(row["score"] <= score for row in body["below"])
+
+
+def test_window_is_capped(mongo_app):
+    submit_many(mongo_app, 27)
+    body = mongo_app.get("/api/leaderboard/around", params={"score": -1, "k": 1000}).json()
+    assert len(body["above"]) == 25
+
+
+def test_bad_requests(mongo_app):
+    assert mongo_app.get("/api/leaderboard/around").status_code == 400
+    assert mongo_app.get("/api/leaderboard/around", params={"digest": "missing"}).status_code == 404
+    assert mongo_app.get("/api/leaderboard/around", params={"score": 1, "day": "junk"}).status_code == 400
+
+
+def test_digest_anchor_right_after_submit(mongo_app, monkeypatch):
+    submissions = submit_many(mongo_app, 4)
+    submission = make_submission(mongo_app.pack(), "beef", "late")
+    response = mongo_app.post("/api/score/submit", json=submission)
+    assert response.status_code == 200
+    digest = server.calculate_replay_digest(server.ReplayLog(**submission["replayLog"]))
+    params = {"digest": digest}
+    
+    # Still queued in the score writer
+    body = mongo_app.get("/api/leaderboard/around", params=params).json()
+    assert body["score"] == response.json()["score"]
+    assert len(body["above"]) + len(body["below"]) == len(submissions)
+    
+    # Written, but not yet replicated to the secondary the window reads from
+    mongo_app.flush()
+    monkeypatch.setattr(server, "read_db", mongo_app.db.client["lagging"])
+    body = mongo_app.get("/api/leaderboard/around", params=params).json()
+    assert body["score"] == response.json()["score"]
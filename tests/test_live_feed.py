@@ -0,0 +1,63 @@
+import server
+from server import LeaderboardBroadcaster, encode_sse
+
+
+def test_stream_relays_board_events(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "broadcaster", LeaderboardBroadcaster(8))
+    assert memory_app.submit("a1").status_code == 200
+    
+    async def scenario():
+        response = await server.stream_leaderboard()
+        stream = response.body_iterator
+        snapshot = await stream.__anext__()
+        assert snapshot.startswith("event: snapshot")
+        assert '"total":1' in snapshot
+        
+        event = encode_sse("insert", {"rank": 1, "row": {}})
+        server.broadcaster.publish("all", event)
+        assert await stream.__anext__() == event
+        await stream.aclose()
+    
+    memory_app.run(scenario())
+    assert not server.broadcaster.subscribers
+
+
+def test_daily_stream_follows_rollover(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "broadcaster", LeaderboardBroadcaster(8))
+    get_board_key = server.get_board_key
+    
+    async def scenario():
+        response = await server.stream_leaderboard(daily=True)
+        stream = response.body_iterator
+        assert (await stream.__anext__()).startswith("event: snapshot")
+        yesterday = get_board_key(True)
+        
+        monkeypatch.setattr(server, "get_board_key", lambda daily, day=None: get_board_key(daily, day or "2099-01-01"))
+        # A late event for the old day wakes the stream; it answers with today's snapshot
+        server.broadcaster.publish(yesterday, encode_sse("insert", {"rank": 1, "row": {}}))
+        assert (await stream.__anext__()).startswith("event: snapshot")
+        assert list(server.broadcaster.subscribers) == ["daily:2099-01-01"]
+        
+        event = encode_sse("insert", {"rank": 1, "row": {}})
+        server.broadcaster.publish("daily:2099-01-01", event)
+        assert await stream.__anext__() == event
+        await stream.aclose()
+    
+    memory_app.run(scenario())
+    assert not server.broadcaster.subscribers
+
+
+def test_slow_consumer_is_closed(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "broadcaster", LeaderboardBroadcaster(1))
+    
+    async def scenario():
+        response = await server.stream_leaderboard()
+        stream = response.body_iterator
+        await stream.__anext__()
+        for rank in range(3):
+            server.broadcaster.publish("all", encode_sse("insert", {"rank": rank, "row": {}}))
+        items = [item async for item in stream]
+        assert items == []
+    
+    memory_app.run(scenario())
+    assert not server.broadcaster.subscribers
@@ -0,0 +1,74 @@
+import logging
+import queue
+
+import server
+from server import LogSampler, NonBlockingQueueHandler
+
+
+def make_record(msg, *args, created=100.0):
+    return logging.makeLogRecord({"msg": msg, "args": args, "levelno": logging.INFO, "created": created})
+
+
+def make_logger(handler):
+    logger = logging.getLogger("test_logging")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_mutable_args_are_rendered_when_logged():
+    handler = NonBlockingQueueHandler(queue.Queue(10))
+    logger = make_logger(handler)
+    summary = {"rows": 1}
+    rows = [1]
+    logger.info("Import progress: %s", summary)
+    logger.info("Rows %s of %d", rows, 5)
+    logger.info("Imported %s rows in %.1fs", 3, 0.25)
+    summary["rows"] = 2
+    rows.append(2)
+    
+    records = [handler.queue.get_nowait() for _ in range(3)]
+    assert [record.getMessage() for record in records] == [
+        "Import progress: {'rows': 1}", "Rows [1] of 5", "Imported 3 rows in 0.2s"
+    ]
+    # Scalar arguments are still formatted on the writer thread
+    assert records[2].args == (3, 0.25)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    logger = make_logger(handler)
+    logger.info("one")
+    logger.info("two")
+    assert handler.queue.qsize() == 1
+
+
+def test_sampler_drops_info_but_keeps_warnings(monkeypatch):
+    sampler = LogSampler({"tick": 0.0}, 0)
+    handler = NonBlockingQueueHandler(queue.Queue(10))
+    handler.addFilter(sampler)
+    logger = make_logger(handler)
+    logger.info("sampled", extra={"event": "tick"})
+    logger.warning("kept", extra={"event": "tick"})
+    logger.info("other")
+    assert [handler.queue.get_nowait().msg for _ in range(handler.queue.qsize())] == ["kept", "other"]
+
+
+def test_sampler_caps_each_message_type_per_second():
+    sampler = LogSampler({}, 2)
+    records = [make_record("burst %s", n) for n in range(3)]
+    assert [sampler.filter(record) for record in records] == [True, True, False]
+    assert sampler.filter(make_record("other"))
+    assert sampler.filter(make_record("burst %s", 9, created=101.0))
+
+
+def test_sampler_adds_trace_ids():
+    span = server.start_span("x")
+    token = server.current_span.set(span)
+    try:
+        record = make_record("traced")
+        assert LogSampler({}, 0).filter(record)
+    finally:
+        server.current_span.reset(token)
+    assert (record.trace_id, record.span_id) == (span["traceId"], span["spanId"])
@@ -0,0 +1,31 @@
+import server
+from server import AdmissionController, MetricsRegistry
+
+
+def requests_total(route, status):
+    return server.metrics.counters.get(("http_requests_total", (("route", route), ("status", status))), 0)
+
+
+def test_routed_requests_use_the_route_template(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "metrics", MetricsRegistry())
+    memory_app.get("/api/health")
+    memory_app.get("/api/no-such-thing")
+    assert requests_total("/api/health", 200) == 1
+    assert requests_total("unmatched", 404) == 1
+
+
+def test_shed_requests_are_measured(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "metrics", MetricsRegistry())
+    monkeypatch.setattr(server, "admission", AdmissionController(0, 0, 0.01))
+    assert memory_app.get("/api/stats").status_code == 503
+    assert requests_total("/api/stats", 503) == 1
+    assert ("http_request_seconds", (("route", "/api/stats"),)) in server.metrics.histograms
+
+
+def test_rate_limited_requests_are_measured(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "metrics", MetricsRegistry())
+    monkeypatch.setattr(server.limiter, "enabled", True)
+    statuses = [memory_app.post("/api/score/submit", json={}).status_code for _ in range(30)]
+    assert 429 in statuses
+    assert requests_total("/api/score/submit", 429) == statuses.count(429)
+    assert requests_total("/api/score/submit", 422) == statuses.count(422)
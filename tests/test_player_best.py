@@ -0,0 +1,39 @@
+from tests.helpers import make_submission
+
+
+def test_best_and_rank_per_player(mongo_app):
+    pack = mongo_app.pack()
+    scores = {}
+    for seed, username in [("a1", "alice"), ("b2", "bob"), ("c3", "alice"), ("d4", "carol")]:
+        response = mongo_app.post("/api/score/submit", json=make_submission(pack, seed, username))
+        assert response.status_code == 200
+        scores.setdefault(username, []).append(response.json()["score"])
+    mongo_app.flush()
+    
+    bests = {username: max(values) for username, values in scores.items()}
+    response = mongo_app.get("/api/leaderboard/me", params={"username": "alice"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["score"] == bests["alice"]
+    # Rank among players, not runs
+    assert body["rank"] == 1 + sum(1 for score in bests.values() if score > bests["alice"])
+    assert body["day"] is None
+
+
+def test_daily_board_is_separate(mongo_app):
+    pack = mongo_app.pack()
+    assert mongo_app.post("/api/score/submit", json=make_submission(pack, "a1", "alice", daily=True)).status_code == 200
+    mongo_app.flush()
+    
+    daily = mongo_app.get("/api/leaderboard/me", params={"username": "alice", "daily": "true"}).json()
+    assert daily["rank"] == 1
+    assert daily["day"]
+    assert mongo_app.get("/api/leaderboard/me", params={"username": "alice"}).status_code == 404
+
+
+def test_unknown_player(mongo_app):
+    assert mongo_app.get("/api/leaderboard/me", params={"username": "nobody"}).status_code == 404
+
+
+def test_needs_mongo(memory_app):
+    assert memory_app.get("/api/leaderboard/me", params={"username": "alice"}).status_code == 501
@@ -0,0 +1,76 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+import server
+from server import ContentPack, GameSimulator, cache_content_pack, get_pack_tables
+
+
+@pytest.fixture(autouse=True)
+def clean_content_cache():
+    saved = dict(server.content_cache)
+    server.content_cache.clear()
+    yield
+    server.content_cache.clear()
+    server.content_cache.update(saved)
+
+
+def test_unchanged_reload_keeps_the_shared_objects():
+    pack = cache_content_pack(ContentPack())
+    tables, body = server.content_cache["tables"], server.content_cache["body"]
+    assert cache_content_pack(ContentPack(**pack.dict())) is pack
+    assert server.content_cache["tables"] is tables
+    assert server.content_cache["body"] is body
+    
+    changed = ContentPack(**dict(pack.dict(), version="9.9.9"))
+    assert cache_content_pack(changed) is changed
+    assert server.content_cache["tables"] is not tables
+
+
+def test_simulators_reuse_the_active_pack_tables():
+    pack = cache_content_pack(ContentPack())
+    assert GameSimulator(pack, "abc").tables is server.content_cache["tables"]
+    
+    other = ContentPack(version="2.0.0")
+    tables = get_pack_tables(other)
+    assert GameSimulator(other, "abc").tables is tables
+    assert tables is not server.content_cache["tables"]
+
+
+def test_preload_loads_the_active_pack(monkeypatch):
+    monkeypatch.setattr(server, "STORAGE_BACKEND", "memory")
+    asyncio.run(server.preload_content_pack())
+    assert server.content_cache["pack"].version == "1.0.2"
+    assert "tables" in server.content_cache
+
+
+def test_forked_child_sees_the_preloaded_pack():
+    pack = cache_content_pack(ContentPack())
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        same = server.content_cache["pack"] is pack and get_pack_tables(pack) is server.content_cache["tables"]
+        os.write(write, b"1" if same else b"0")
+        os._exit(0)
+    os.close(write)
+    result = os.read(read, 1)
+    os.close(read)
+    os.waitpid(pid, 0)
+    assert result == b"1"
+
+
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs /proc/<pid>/smaps_rollup")
+def test_process_memory_reports_resident_breakdown():
+    memory = server.process_memory()
+    assert set(memory) == {
+        "resident_memory_bytes", "proportional_memory_bytes", "shared_memory_bytes", "private_memory_bytes"
+    }
+    assert memory["resident_memory_bytes"] > 0
+    assert memory["shared_memory_bytes"] + memory["private_memory_bytes"] == memory["resident_memory_bytes"]
+
+
+def test_process_memory_is_empty_for_missing_process():
+    assert server.process_memory(2 ** 22 + 1) == {}
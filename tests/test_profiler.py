@@ -0,0 +1,53 @@
+import time
+
+import server
+from server import RequestProfiler, fold_stack
+from tests.helpers import ADMIN_HEADERS
+
+
+def test_fold_stack_is_root_first():
+    def inner():
+        import sys
+        return fold_stack(sys._getframe())
+    
+    stack = inner().split(";")
+    assert stack[-1].startswith("inner (test_profiler.py:")
+    assert stack[-2].startswith("test_fold_stack_is_root_first (")
+
+
+def test_samples_the_profiled_thread():
+    profiler = RequestProfiler(0.001, 2)
+    profile = profiler.start("GET /slow")
+    time.sleep(0.05)
+    profiler.stop(profile)
+    
+    assert profile["duration_ms"] >= 50
+    assert any("test_samples_the_profiled_thread" in stack for stack in profile["samples"])
+    line = profiler.folded().splitlines()[0]
+    assert line.startswith("GET /slow;")
+    assert int(line.rsplit(" ", 1)[1]) >= 1
+    
+    # The sampler thread stops once nothing is profiled
+    time.sleep(0.01)
+    assert profiler.thread is None
+
+
+def test_ring_buffer_keeps_the_latest():
+    profiler = RequestProfiler(0.001, 2)
+    for route in ("a", "b", "c"):
+        profiler.stop(profiler.start(route))
+    assert [profile["route"] for profile in profiler.profiles] == ["b", "c"]
+
+
+def test_only_admin_opt_in_is_profiled(memory_app, monkeypatch):
+    monkeypatch.setattr(server, "profiler", RequestProfiler(0.001, 5))
+    assert memory_app.get("/api/health", headers={"X-Profile": "guess"}).status_code == 200
+    assert not server.profiler.profiles
+    
+    assert memory_app.get("/api/health", headers={"X-Profile": server.ADMIN_API_KEY}).status_code == 200
+    listed = memory_app.get("/api/admin/profiles", headers=ADMIN_HEADERS).json()
+    assert [profile["route"] for profile in listed] == ["GET /api/health"]
+    
+    folded = memory_app.get("/api/admin/profiles/folded", params={"id": listed[0]["id"] + 1}, headers=ADMIN_HEADERS)
+    assert folded.text == "\n"
+    assert memory_app.get("/api/admin/profiles").status_code == 422
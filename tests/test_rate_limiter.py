@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import server
+from server import SharedRateLimiter
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ratelimit")
+
+
+def test_bucket_allows_capacity_then_reports_wait(path):
+    limiter = SharedRateLimiter(path, 64)
+    assert [limiter.acquire("client", 1.0, 3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = limiter.acquire("client", 1.0, 3)
+    assert 0.9 < wait <= 1.0
+    # Other keys have their own bucket
+    assert limiter.acquire("other", 1.0, 3) == 0.0
+
+
+def test_workers_share_the_table(path):
+    first, second = SharedRateLimiter(path, 64), SharedRateLimiter(path, 64)
+    assert first.acquire("client", 0.001, 2) == 0.0
+    assert second.acquire("client", 0.001, 2) == 0.0
+    assert first.acquire("client", 0.001, 2) > 0
+
+
+def test_forked_worker_consumes_from_the_same_bucket(path):
+    limiter = SharedRateLimiter(path, 64)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if limiter.acquire("client", 0.001, 1) == 0.0 else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert limiter.acquire("client", 0.001, 1) > 0
+
+
+def test_full_set_evicts_least_recently_used_slot(path):
+    limiter = SharedRateLimiter(path, SharedRateLimiter.WAYS)
+    before = server.metrics.counters.get(("rate_limit_evictions_total", ()), 0)
+    for i in range(SharedRateLimiter.WAYS):
+        assert limiter.acquire(f"client-{i}", 0.001, 1) == 0.0
+    # One set only: a new key takes over client-0's slot with a full bucket
+    assert limiter.acquire("newcomer", 0.001, 1) == 0.0
+    assert server.metrics.counters[("rate_limit_evictions_total", ())] == before + 1
+    assert limiter.acquire("client-0", 0.001, 1) == 0.0
+    assert limiter.acquire("client-3", 0.001, 1) > 0
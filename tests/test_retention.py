@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+def index_keys(app, collection):
+    return {name: info for name, info in app.run(app.db[collection].index_information()).items()}
+
+
+def test_daily_rows_expire_and_all_time_rows_do_not(mongo_app):
+    assert mongo_app.submit("a1", daily=True).status_code == 200
+    assert mongo_app.submit("b2").status_code == 200
+    mongo_app.flush()
+    daily = mongo_app.run(mongo_app.db.scores.find_one({"daily": True}))
+    start = datetime.strptime(daily["day"], '%Y-%m-%d')
+    assert daily["expire_at"].replace(tzinfo=None) == start + timedelta(days=1 + server.SCORE_RETENTION_DAYS)
+    assert mongo_app.run(mongo_app.db.scores.find_one({"daily": False}))["expire_at"] is None
+
+
+def test_ttl_index_on_expire_at(mongo_app):
+    ttl = [info for info in index_keys(mongo_app, "scores").values() if "expireAfterSeconds" in info]
+    assert [info["key"] for info in ttl] == [[("expire_at", 1)]]
+
+
+def test_digest_registry_outlives_expired_rows(mongo_app):
+    assert mongo_app.submit("a1", daily=True).status_code == 200
+    mongo_app.flush()
+    # The TTL monitor removed the row; the run still can't be submitted again
+    mongo_app.run(mongo_app.db.scores.delete_many({}))
+    response = mongo_app.submit("a1", daily=True)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Score already submitted"
+
+
+def test_closed_days_in_the_window_are_archived(mongo_app, monkeypatch):
+    monkeypatch.setattr(server, "SCORE_RETENTION_DAYS", 3)
+    mongo_app.run(server.archive_closed_days())
+    days = sorted(doc["day"] for doc in mongo_app.run(mongo_app.db.daily_archives.find().to_list(None)))
+    today = datetime.now(timezone.utc)
+    expected = [(today - timedelta(days=n)).strftime('%Y-%m-%d') for n in (3, 2, 1)]
+    assert days == [day for day in expected if server.is_closed_day(day)]
+    # Already archived days are skipped
+    mongo_app.run(server.archive_closed_days())
+    assert mongo_app.run(mongo_app.db.daily_archives.count_documents({})) == len(days)
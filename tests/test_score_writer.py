@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from server import MemoryStorage, ScoreQueueFull, ScoreWriter, StorageUnavailable
+from tests.helpers import make_submission
+
+
+def score_doc(digest, score, username="u"):
+    return {"replay_digest": digest, "score": score, "username": username, "daily": False, "day": None}
+
+
+class FailingStorage(MemoryStorage):
+    async def insert_scores(self, docs):
+        raise StorageUnavailable(1)
+
+
+class PickyStorage(MemoryStorage):
+    """Rejects any batch holding an oversized row, as Mongo does with DocumentTooLarge"""
+    async def insert_scores(self, docs):
+        if any(len(doc["username"]) > 100 for doc in docs):
+            raise ValueError("document too large")
+        await super().insert_scores(docs)
+
+
+@pytest.fixture
+def memory_storage(monkeypatch):
+    store = MemoryStorage()
+    monkeypatch.setattr(server, "storage", store)
+    return store
+
+
+def test_submit_rejects_when_full(memory_storage):
+    writer = ScoreWriter(max_pending=2, batch_size=10, flush_interval=1)
+    writer.submit("all", score_doc("a", 1), [])
+    writer.submit("all", score_doc("b", 2), [])
+    with pytest.raises(ScoreQueueFull):
+        writer.submit("all", score_doc("c", 3), [])
+
+
+def test_flush_writes_one_batch(memory_storage):
+    writer = ScoreWriter(max_pending=10, batch_size=2, flush_interval=1)
+    for i, score in enumerate((30, 10, 20)):
+        writer.submit("all", score_doc(str(i), score), [])
+    asyncio.run(writer.flush())
+    assert memory_storage.written == {"0", "1"}
+    assert writer.in_flight == []
+    assert [entry["score"]["score"] for entry in writer.buffer] == [20]
+
+
+def test_pending_rows_are_per_board(memory_storage):
+    writer = ScoreWriter(max_pending=10, batch_size=10, flush_interval=1)
+    writer.submit("all", score_doc("a", 30), [])
+    writer.submit("daily:2024-01-01", score_doc("b", 40), [])
+    writer.submit("all", score_doc("c", 10), [])
+    rows = asyncio.run(writer.pending_rows("all"))
+    assert [row["replay_digest"] for row in rows] == ["a", "c"]
+    assert asyncio.run(writer.pending_above("all", 20)) == 1
+
+
+def test_pending_rows_skip_in_flight_rows_already_stored(memory_storage):
+    writer = ScoreWriter(max_pending=10, batch_size=10, flush_interval=1)
+    stored, unstored = score_doc("a", 30), score_doc("b", 20)
+    asyncio.run(memory_storage.insert_scores([stored]))
+    writer.in_flight = [{"board": "all", "score": stored, "items": []}, {"board": "all", "score": unstored, "items": []}]
+    rows = asyncio.run(writer.pending_rows("all"))
+    assert [row["replay_digest"] for row in rows] == ["b"]
+
+
+def test_failed_flush_returns_batch_to_buffer(monkeypatch):
+    monkeypatch.setattr(server, "storage", FailingStorage())
+    writer = ScoreWriter(max_pending=10, batch_size=1, flush_interval=1)
+    writer.submit("all", score_doc("a", 30), [])
+    writer.submit("all", score_doc("b", 20), [])
+    with pytest.raises(StorageUnavailable):
+        asyncio.run(writer.flush())
+    assert [entry["score"]["replay_digest"] for entry in writer.buffer] == ["a", "b"]
+    assert writer.in_flight == []
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_land(monkeypatch, tmp_path):
+    store = PickyStorage()
+    monkeypatch.setattr(server, "storage", store)
+    monkeypatch.setattr(server, "SCORE_DEAD_LETTER_FILE", str(tmp_path / "dead.ndjson"))
+    writer = ScoreWriter(max_pending=3, batch_size=3, flush_interval=1)
+    asyncio.run(store.claim_digest("bad"))
+    writer.submit("all", score_doc("a", 30), [])
+    writer.submit("all", score_doc("bad", 20, username="x" * 1000), [{"hash": "h1"}])
+    writer.submit("all", score_doc("c", 10), [])
+    assert writer.full()
+    
+    asyncio.run(writer.flush())
+    assert store.written == {"a", "c"}
+    assert writer.buffer == [] and not writer.full()
+    assert writer.pending_one_of_ones == set()
+    # The run can be submitted again
+    assert not asyncio.run(store.has_digest("bad"))
+    lines = [json.loads(line) for line in (tmp_path / "dead.ndjson").read_text().splitlines()]
+    assert [line["replay_digest"] for line in lines] == ["bad"]
+    assert lines[0]["error"] == "document too large"
+
+
+def test_board_reload_failure_leaves_digest_unclaimed(memory_app, monkeypatch):
+    submission = make_submission(memory_app.pack(), "a1")
+    get_top_board = server.get_top_board
+    failures = [StorageUnavailable(1)]
+    
+    async def flaky(daily, day=None):
+        if failures:
+            raise failures.pop()
+        return await get_top_board(daily, day)
+    
+    monkeypatch.setattr(server, "get_top_board", flaky)
+    response = memory_app.post("/api/score/submit", json=submission)
+    assert response.status_code == 503
+    # The retry is not mistaken for a duplicate
+    assert memory_app.post("/api/score/submit", json=submission).status_code == 200
+
+
+def test_username_length_is_capped(memory_app):
+    submission = make_submission(memory_app.pack(), "a1", username="x" * 33)
+    assert memory_app.post("/api/score/submit", json=submission).status_code == 422
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import server
+from server import GuardedStorage, MemoryStorage, MongoStorage, SqliteStorage, Storage
+
+
+def test_backends_implement_the_whole_interface(tmp_path):
+    MongoStorage(server.db, server.read_db)
+    SqliteStorage(str(tmp_path / "scores.db"))
+    GuardedStorage(MemoryStorage(), server.CircuitBreaker(1, 1.0, 1.0, 1.0))
+
+
+def test_incomplete_backend_cannot_be_created():
+    class PacksOnly(Storage):
+        async def get_active_pack(self):
+            return None
+    
+    with pytest.raises(TypeError):
+        PacksOnly()
+
+
+def test_active_pack_key_follows_the_active_pack(tmp_path):
+    async def scenario(store):
+        await store.connect()
+        try:
+            assert await store.active_pack_key() is None
+            await store.set_active_pack({"version": "1.0", "active": True})
+            first = await store.active_pack_key()
+            assert first[1] == "1.0"
+            await store.set_active_pack({"version": "1.0", "active": True})
+            second = await store.active_pack_key()
+            assert second[1] == "1.0" and second != first
+        finally:
+            await store.close()
+    
+    for store in (MemoryStorage(), SqliteStorage(str(tmp_path / "scores.db"))):
+        asyncio.run(scenario(store))
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from server import TopBoard
+
+
+def row(score, username="u"):
+    return {"username": username, "score": score}
+
+
+def test_insert_keeps_rows_sorted_and_returns_rank():
+    top = TopBoard(10)
+    assert top.insert(row(50)) == 1
+    assert top.insert(row(80)) == 1
+    assert top.insert(row(60)) == 2
+    assert [r["score"] for r in top.rows] == [80, 60, 50]
+    assert top.keys == [-80, -60, -50]
+    assert top.total == 3
+
+
+def test_ties_rank_after_existing_rows():
+    top = TopBoard(10)
+    top.insert(row(50, "first"))
+    assert top.insert(row(50, "second")) == 2
+    assert [r["username"] for r in top.rows] == ["first", "second"]
+
+
+def test_full_board_drops_rows_below_the_cut():
+    top = TopBoard(3)
+    for score in (10, 20, 30):
+        top.insert(row(score))
+    assert top.insert(row(5)) is None
+    assert top.insert(row(25)) == 2
+    assert [r["score"] for r in top.rows] == [30, 25, 20]
+    assert top.total == 5
+
+
+def test_placement_only_inside_materialized_rows():
+    top = TopBoard(2)
+    for score in (10, 20, 30):
+        top.insert(row(score))
+    assert top.placement(40) == 1
+    assert top.placement(25) == 2
+    # Below the cut with more rows in storage than materialized
+    assert top.placement(5) is None
+
+
+def test_placement_on_complete_board():
+    top = TopBoard(10)
+    for score in (10, 20):
+        top.insert(row(score))
+    assert top.placement(5) == 3
+
+
+def test_covers_and_page():
+    top = TopBoard(2)
+    for score in (10, 20, 30):
+        top.insert(row(score))
+    assert top.covers(0, 2)
+    assert not top.covers(1, 2)
+    assert [r["score"] for r in top.page(1, 5)] == [20]
+
+
+def test_page_timestamps_share_one_format(mongo_app):
+    # A row as pymongo returns it (naive UTC) next to one accepted in-process (aware)
+    mongo_app.run(mongo_app.db.scores.insert_one({
+        "daily": False, "score": 1, "depth": 1, "artifacts": [], "username": "old",
+        "replay_digest": "old", "created_at": datetime(2024, 1, 1, 12, 0, 0)
+    }))
+    assert mongo_app.submit("a1").status_code == 200
+    rows = mongo_app.get("/api/leaderboard").json()["rows"]
+    assert len(rows) == 2
+    assert all(row["created_at"].endswith("Z") for row in rows)
+    assert "2024-01-01T12:00:00Z" in [row["created_at"] for row in rows]
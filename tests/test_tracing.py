@@ -0,0 +1,74 @@
+import json
+
+from fastapi import HTTPException
+
+import server
+from server import SpanExporter, end_span, parse_traceparent, start_span
+from tests.helpers import make_submission
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def read_spans(path):
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource in json.loads(line)["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return spans
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == {"traceId": TRACE_ID, "spanId": PARENT_ID}
+    assert parse_traceparent("garbage") is None
+
+
+def test_client_errors_are_not_span_errors():
+    span = start_span("x")
+    end_span(span, HTTPException(status_code=404))
+    assert "status" not in span
+    end_span(span, RuntimeError("boom"))
+    assert span["status"] == {"code": 2, "message": "RuntimeError: boom"}
+
+
+def test_export_writes_otlp_lines_and_rotates(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = SpanExporter(str(path), 1, 2)
+    for index in range(4):
+        exporter.export(start_span("s", index=index, ok=True))
+        exporter.flush()
+    
+    # Each flush past max_bytes rotates; only `backups` old files are kept
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["spans.jsonl", "spans.jsonl.1", "spans.jsonl.2"]
+    [span] = read_spans(path)
+    assert span["attributes"] == [
+        {"key": "index", "value": {"intValue": "3"}},
+        {"key": "ok", "value": {"boolValue": True}}
+    ]
+
+
+def test_request_spans_continue_the_incoming_trace(memory_app, monkeypatch, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(server, "span_exporter", SpanExporter(str(path), 1 << 20, 1))
+    response = memory_app.post(
+        "/api/score/submit",
+        json=make_submission(memory_app.pack(), "a1"),
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    )
+    assert response.status_code == 200
+    server.span_exporter.flush()
+    
+    spans = {span["name"]: span for span in read_spans(path)}
+    root = spans["POST /api/score/submit"]
+    assert (root["traceId"], root["parentSpanId"]) == (TRACE_ID, PARENT_ID)
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+    for stage in ("submit.digest", "submit.insert"):
+        assert spans[stage]["traceId"] == TRACE_ID
+        assert spans[stage]["parentSpanId"] == root["spanId"]
+
+
+def test_tracing_off_without_a_file(memory_app):
+    assert not server.span_exporter.enabled
+    assert memory_app.get("/api/health").status_code == 200
+    assert not server.span_exporter.queue